@@ -1,22 +1,17 @@
-from LLM.generate_resume_prompt import build_resume_prompt
+from LLM.generate_resume_prompt import build_resume_prompt, build_rewrite_prompt
 from langgraph.graph import StateGraph
-from langchain_core.runnables import Runnable, RunnableConfig
 from typing import TypedDict
 import json
-import os
-from fastapi import  HTTPException
-from dotenv import load_dotenv
 
-from LLM.load_prompt import load_prompt
-from LLM.utils import get_prompt
-from schemas import ResumeCreate
-load_dotenv() 
+from pydantic import TypeAdapter, ValidationError
 
-import google.generativeai as genai
-GEMINI_API_TOKEN = os.getenv("GEMINI_API_TOKEN")
-if not GEMINI_API_TOKEN:
-    raise ValueError("GEMINI_API_TOKEN environment variable not set")
-genai.configure(api_key=GEMINI_API_TOKEN)
+from LLM.ats_scorer import ATS_EVALUATOR, is_borderline, score_resume, section_feedback
+from LLM.client import llm_client
+from LLM.job_analysis import find_key_points, save_key_points, validate_key_points
+from LLM.prompt_registry import prompt_registry
+from LLM.resilience import deadline_share, time_left
+from metrics import graph_node
+from schemas import ResumeCreate
 
 class ResumeState(TypedDict):
     profile_data: dict
@@ -25,86 +20,162 @@ class ResumeState(TypedDict):
     hr_key_points: dict
     score: int
     attempts: int
+    no_cache: bool  # skip cached LLM responses for this run
+    score_source: str  # "local" or "llm", whichever evaluator produced the score
+    section_feedback: dict  # section -> what the evaluator wants fixed; drives the partial rewrite
 
-def query_to_llm(prompt: str) -> str:
-    """Helper function to query the Gemini API for chat completions."""
-    model = genai.GenerativeModel('gemini-2.0-flash-exp')  # Or 'gemini-pro-vision' for multimodal
+def parse_json(response: str):
+    """The JSON of a model response, markdown code fences removed."""
+    return json.loads(response.replace("```json", "").replace("```", ""))
 
+def parse_json_object(response: str, error: str) -> dict:
     try:
-        response = model.generate_content(prompt)
-        
-
-        # The text output is directly accessible
-        generated_text = response.text.strip()
-        print(generated_text)
-        return generated_text
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Gemini API call failed: {str(e)}")
+        value = parse_json(response)
+    except json.JSONDecodeError as e:
+        raise Exception(f"{error}: {e}")
+    if not isinstance(value, dict):
+        raise Exception(f"{error}: expected a JSON object, got {type(value).__name__}")
+    return value
 
-def hr_specialist_agent(state: ResumeState) -> ResumeState:
-    job_desc = state["job_description"]
+def parse_key_points(response: str) -> dict:
+    try:
+        return validate_key_points(parse_json_object(response, "Invalid JSON from HR agent"))
+    except ValueError as e:
+        raise Exception(f"Invalid key points from HR agent: {e}")
 
-    hr_prompt = load_prompt(prompt_file= get_prompt("agents.yaml"),
-                            prompt_key='hr_prompt',
-                            job_desc=job_desc)
+async def extract_key_points(job_desc: str, use_cache: bool = True) -> dict:
+    """Skills and expectations of a job description; a stored analysis of the same posting is reused."""
+    if use_cache:
+        key_points = await find_key_points(job_desc)
+        if key_points is not None:
+            return key_points
 
-    hr_response = query_to_llm(hr_prompt)
-    hr_response = hr_response.replace("```json", "").replace("```", "")
+    hr_prompt = prompt_registry.render("agents.yaml", "hr_prompt", job_desc=job_desc)
 
-    try:
-        key_points = json.loads(hr_response)
-    except json.JSONDecodeError as e:
-        raise Exception(f"Invalid JSON from HR agent: {str(e)}\nResponse was: {hr_response}")
+    key_points = await llm_client.generate(hr_prompt, use_cache=use_cache, label="agents.yaml:hr_prompt", parse=parse_key_points)
+    await save_key_points(job_desc, key_points)
+    return key_points
 
+async def hr_specialist_agent(state: ResumeState) -> ResumeState:
+    key_points = await extract_key_points(state["job_description"], use_cache=not state.get("no_cache"))
     return {**state, "hr_key_points": key_points}
 
 
 # Generator node
-def generator_agent(state: ResumeState) -> ResumeState:
+async def generator_agent(state: ResumeState, use_cache: bool = True) -> ResumeState:
     prompt = build_resume_prompt(state["profile_data"], state["hr_key_points"])
-    resume_json = query_to_llm(prompt)
-    try:
-        resume_json = resume_json.replace("```json", "").replace("```", "")
-        resume_data = json.loads(resume_json)
-    except json.JSONDecodeError:
-        raise Exception("Invalid resume JSON")
+    resume_data = await llm_client.generate(
+        prompt, use_cache=use_cache and not state.get("no_cache"), label="build_resume.yaml:prompt",
+        parse=lambda response: parse_json_object(response, "Invalid resume JSON"),
+    )
     return {**state, "generated_resume": resume_data}
 
 
-# Evaluator node
-def evaluator_agent(state: ResumeState) -> ResumeState:
-    resume = state["generated_resume"]
-    job_desc = state["job_description"]
+# Sections the rewrite node may regenerate (ResumeCreate fields; title is kept as generated)
+REWRITABLE_SECTIONS = ("personal_info", "experiences", "educations", "skills", "certifications", "projects")
+# Schema of each rewritten section; personal_info only contributes its summary
+SECTION_ADAPTERS = {
+    section: TypeAdapter(ResumeCreate.model_fields[section].annotation)
+    for section in REWRITABLE_SECTIONS if section != "personal_info"
+}
 
-    eval_prompt = load_prompt(prompt_file= get_prompt("agents.yaml"),
-                            prompt_key='eval_prompt',
-                            job_desc=job_desc,
-                            resume = json.dumps(resume, indent=2)
-                            )
+# LLM judge, also used by benchmarks/ats_scorer.py
+async def llm_ats_evaluation(resume: dict, job_desc: str, use_cache: bool = True):
+    """Score and per-section remarks ({section: what to fix}) from the LLM judge."""
+    eval_prompt = prompt_registry.render("agents.yaml", "eval_prompt", job_desc=job_desc, resume=resume)
 
+    evaluation = await llm_client.generate(
+        eval_prompt, use_cache=use_cache, label="agents.yaml:eval_prompt",
+        parse=lambda response: parse_json_object(response, "Invalid evaluation JSON"),
+    )
+    sections = evaluation.get("sections")
+    return evaluation.get("score", 0), sections if isinstance(sections, dict) else {}
 
-    eval_response = query_to_llm(eval_prompt)
-    # print(f"-----{eval_response}--------")
-    eval_response  = eval_response.replace("```json", "").replace("```", "")
-    score = json.loads(eval_response).get("score", 0)
-    return {**state, "score": score}
+# Evaluator node
+async def evaluator_agent(state: ResumeState) -> ResumeState:
+    resume = state["generated_resume"]
+    local_feedback = None
+
+    if ATS_EVALUATOR in ("local", "hybrid"):
+        local_score = score_resume(resume, state["hr_key_points"]).score
+        local_feedback = section_feedback(resume, state["hr_key_points"])
+        # hybrid: only ask the LLM judge when the local score is too close to call
+        if ATS_EVALUATOR == "local" or not is_borderline(local_score):
+            return {**state, "score": local_score, "score_source": "local", "section_feedback": local_feedback}
+
+    score, feedback = await llm_ats_evaluation(resume, state["job_description"], use_cache=not state.get("no_cache"))
+    if not feedback:
+        # The judge didn't say what to fix; the local diagnostics still let the rewrite stay partial
+        feedback = local_feedback if local_feedback is not None else section_feedback(resume, state["hr_key_points"])
+    return {**state, "score": score, "score_source": "llm", "section_feedback": feedback}
+
+# Rewrite node: regenerate only the sections the evaluator flagged
+async def rewrite_agent(state: ResumeState) -> ResumeState:
+    attempts = state["attempts"] + 1
+    feedback = {
+        section: remark for section, remark in (state.get("section_feedback") or {}).items()
+        if section in REWRITABLE_SECTIONS
+    }
+    if not feedback:
+        # Nothing to target: generate the whole resume again, not the cached first generation
+        return {**(await generator_agent(state, use_cache=False)), "attempts": attempts}
+
+    resume = state["generated_resume"]
+    prompt = build_rewrite_prompt(state["profile_data"], state["hr_key_points"], resume, feedback)
+    rewritten = await llm_client.generate(
+        prompt, use_cache=not state.get("no_cache"), label="build_resume.yaml:rewrite_sections",
+        parse=lambda response: parse_json_object(response, "Invalid rewritten sections JSON"),
+    )
+
+    merged = dict(resume)
+    for section in feedback:
+        if section not in rewritten:
+            continue
+        if section == "personal_info":
+            # Contact details always come from the profile; only the summary is rewritten
+            personal_info = rewritten["personal_info"]
+            summary = personal_info.get("summary") if isinstance(personal_info, dict) else None
+            if summary and isinstance(summary, str):
+                merged["personal_info"] = {**(resume.get("personal_info") or {}), "summary": summary}
+        else:
+            # A malformed section keeps the previous version instead of breaking the final resume
+            try:
+                SECTION_ADAPTERS[section].validate_python(rewritten[section])
+            except ValidationError:
+                continue
+            merged[section] = rewritten[section]
+    return {**state, "generated_resume": merged, "attempts": attempts}
+
+# Below this many seconds left on the request deadline, the current resume is returned instead of rewritten
+REWRITE_MIN_TIME_LEFT = 5
 
 # Router
 def router(state: ResumeState) -> str:
-    if state["score"] >= 70 or state["attempts"] >= 3:
+    left = time_left()
+    if state["score"] >= 70 or state["attempts"] >= 3 or (left is not None and left < REWRITE_MIN_TIME_LEFT):
         return "return_result"
     else:
-        state["attempts"] += 1
+        # attempts is incremented by rewrite_agent; changes made here are not kept in the graph state
         return "rewrite_resume"
 
+def instrumented(name: str, node, parts: int = 1):
+    """
+    Run ``node`` with 1/``parts`` of the deadline left, ``parts`` counting it and the
+    LLM calls expected after it, timed and with its LLM calls labelled as ``name``.
+    """
+    async def run(state: ResumeState) -> ResumeState:
+        with graph_node(name), deadline_share(parts):
+            return await node(state)
+    return run
 
 # Define the LangGraph
 graph = StateGraph(ResumeState)
 
-graph.add_node("extract_key_points", hr_specialist_agent)
-graph.add_node("generate_resume", generator_agent)
-graph.add_node("evaluate_resume", evaluator_agent)
-graph.add_node("rewrite_resume", generator_agent)
+# Happy path: key points, generation, evaluation; a rewrite is followed by another evaluation
+graph.add_node("extract_key_points", instrumented("extract_key_points", hr_specialist_agent, 3))
+graph.add_node("generate_resume", instrumented("generate_resume", generator_agent, 2))
+graph.add_node("evaluate_resume", instrumented("evaluate_resume", evaluator_agent))
+graph.add_node("rewrite_resume", instrumented("rewrite_resume", rewrite_agent, 2))
 graph.add_node("return_result", lambda state: state)
 
 graph.add_edge("extract_key_points", "generate_resume")
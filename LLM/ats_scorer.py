@@ -0,0 +1,196 @@
+import os
+import re
+from dataclasses import dataclass, field
+from typing import List
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# Which evaluator the resume graph uses:
+#   llm    - ask Gemini for every generated resume (previous behaviour)
+#   local  - score locally only
+#   hybrid - score locally and ask Gemini only when the local score is borderline
+ATS_EVALUATOR = os.getenv("ATS_EVALUATOR", "llm").lower()
+# The borderline band is a starting guess, not calibrated against LLM scores:
+# measure it with benchmarks/ats_scorer.py on your own cases before using hybrid mode.
+ATS_HYBRID_LOW = int(os.getenv("ATS_HYBRID_LOW", "60"))
+ATS_HYBRID_HIGH = int(os.getenv("ATS_HYBRID_HIGH", "80"))
+
+WEIGHTS = {
+    "keyword_coverage": 0.5,
+    "section_completeness": 0.2,
+    "text_density": 0.15,
+    "contact_parseability": 0.15,
+}
+SKILL_WEIGHT = 0.6  # of keyword coverage; the rest goes to expectations
+
+# Words per description that read well to a recruiter and parse well in an ATS
+DENSITY_MIN_WORDS = 10
+DENSITY_MAX_WORDS = 150
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or our the their to we will with you your "
+    "ability able across all also any using use within work working strong good excellent experience".split()
+)
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z0-9]")
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[a-z]{2,}$", re.IGNORECASE)
+_URL = re.compile(r"^(https?://)?([a-z0-9-]+\.)+[a-z]{2,}(/\S*)?$", re.IGNORECASE)
+
+
+@dataclass
+class AtsScore:
+    score: int  # 0-100
+    keyword_coverage: float  # components are 0-1
+    section_completeness: float
+    text_density: float
+    contact_parseability: float
+    missing_keywords: List[str] = field(default_factory=list)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def resume_text(resume: dict) -> str:
+    """Every string value of the resume, which is what an ATS indexes."""
+    parts = []
+
+    def walk(value):
+        if isinstance(value, str):
+            parts.append(value)
+        elif isinstance(value, dict):
+            for item in value.values():
+                walk(item)
+        elif isinstance(value, list):
+            for item in value:
+                walk(item)
+
+    walk(resume)
+    return "\n".join(parts)
+
+
+def _phrase_coverage(phrase: str, text: str, tokens: set) -> float:
+    words = tokenize(phrase)
+    if not words:
+        return 1.0
+    if re.search(r"(?<![a-z0-9])" + re.escape(" ".join(words)) + r"(?![a-z0-9])", text):
+        return 1.0
+    significant = [word for word in words if word not in STOPWORDS] or words
+    return sum(word in tokens for word in significant) / len(significant)
+
+
+def keyword_coverage(resume: dict, key_points: dict):
+    text = " ".join(tokenize(resume_text(resume)))
+    tokens = set(text.split())
+    skills = [skill for skill in key_points.get("skills") or [] if isinstance(skill, str)]
+    expectations = [item for item in key_points.get("expectations") or [] if isinstance(item, str)]
+
+    skill_scores = [_phrase_coverage(skill, text, tokens) for skill in skills]
+    missing = [skill for skill, covered in zip(skills, skill_scores) if covered < 0.5]
+    # Expectations are sentences; half of their significant words showing up counts as covered
+    expectation_scores = [min(1.0, _phrase_coverage(item, text, tokens) * 2) for item in expectations]
+
+    skill_part = sum(skill_scores) / len(skill_scores) if skill_scores else 1.0
+    expectation_part = sum(expectation_scores) / len(expectation_scores) if expectation_scores else 1.0
+    return SKILL_WEIGHT * skill_part + (1 - SKILL_WEIGHT) * expectation_part, missing
+
+
+def section_completeness(resume: dict) -> float:
+    personal_info = resume.get("personal_info") or {}
+    required = [
+        bool(personal_info.get("summary")),
+        bool(resume.get("experiences")),
+        bool(resume.get("educations")),
+        bool(resume.get("skills")),
+    ]
+    optional = [bool(resume.get("certifications")), bool(resume.get("projects"))]
+    experiences = resume.get("experiences") or []
+    described = sum(bool((item.get("description") or "").strip()) for item in experiences)
+    score = 0.7 * sum(required) / len(required) + 0.15 * sum(optional) / len(optional)
+    score += 0.15 * (described / len(experiences) if experiences else 0.0)
+    return score
+
+
+def _description_density(description: str) -> float:
+    words = len(description.split())
+    if words == 0:
+        return 0.0
+    if words < DENSITY_MIN_WORDS:
+        return 0.5
+    if words <= DENSITY_MAX_WORDS:
+        return 1.0
+    return max(0.0, 1 - (words - DENSITY_MAX_WORDS) / DENSITY_MAX_WORDS)
+
+
+def text_density(resume: dict) -> float:
+    descriptions = [
+        item.get("description") or ""
+        for section in ("experiences", "projects")
+        for item in resume.get(section) or []
+    ]
+    if not descriptions:
+        return 0.0
+    return sum(_description_density(description) for description in descriptions) / len(descriptions)
+
+
+def contact_parseability(resume: dict) -> float:
+    personal_info = resume.get("personal_info") or {}
+    checks = [
+        len((personal_info.get("full_name") or "").split()) >= 1,
+        bool(_EMAIL.match((personal_info.get("email") or "").strip())),
+        7 <= len(re.sub(r"\D", "", personal_info.get("phone") or "")) <= 15,
+    ]
+    for link in ("linkedin", "github", "facebook", "x"):
+        if personal_info.get(link):
+            checks.append(bool(_URL.match(personal_info[link].strip())))
+    return sum(checks) / len(checks)
+
+
+def score_resume(resume: dict, key_points: dict) -> AtsScore:
+    """Deterministic 0-100 ATS score of a resume (ResumeCreate dict) against extracted key points."""
+    coverage, missing = keyword_coverage(resume, key_points or {})
+    components = {
+        "keyword_coverage": coverage,
+        "section_completeness": section_completeness(resume),
+        "text_density": text_density(resume),
+        "contact_parseability": contact_parseability(resume),
+    }
+    total = sum(WEIGHTS[name] * value for name, value in components.items())
+    return AtsScore(
+        score=round(total * 100),
+        missing_keywords=missing,
+        **{name: round(value, 4) for name, value in components.items()},
+    )
+
+
+def section_feedback(resume: dict, key_points: dict) -> dict:
+    """Which sections of the resume hold the score back, and why, keyed by ResumeCreate field."""
+    feedback = {}
+    _, missing = keyword_coverage(resume, key_points or {})
+    if missing:
+        feedback["skills"] = (
+            "Job skills not found in the resume: " + ", ".join(missing)
+            + ". Surface them only if the profile supports them."
+        )
+    if not (resume.get("personal_info") or {}).get("summary"):
+        feedback["personal_info"] = "The summary is missing; write one tailored to the job."
+    for section in ("experiences", "projects"):
+        items = resume.get(section) or []
+        weak = [item.get("title") or "untitled" for item in items if _description_density(item.get("description") or "") < 1]
+        if weak:
+            feedback[section] = (
+                f"Descriptions that are empty, too short or longer than {DENSITY_MAX_WORDS} words: "
+                + ", ".join(weak) + "."
+            )
+    expectations = [item for item in (key_points or {}).get("expectations") or [] if isinstance(item, str)]
+    if expectations and resume.get("experiences"):
+        text = " ".join(tokenize(resume_text(resume.get("experiences"))))
+        uncovered = [item for item in expectations if _phrase_coverage(item, text, set(text.split())) < 0.5]
+        if uncovered:
+            note = "Experience descriptions don't show these expectations: " + "; ".join(uncovered) + "."
+            feedback["experiences"] = f"{feedback['experiences']} {note}" if "experiences" in feedback else note
+    return feedback
+
+
+def is_borderline(score: int) -> bool:
+    return ATS_HYBRID_LOW <= score <= ATS_HYBRID_HIGH
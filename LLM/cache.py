@@ -0,0 +1,135 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from dotenv import load_dotenv
+load_dotenv()
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm.sqlite3")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+_TRAILING_SPACE = re.compile(r"[ \t]+\n")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Ignore differences that don't change what the model sees: line endings and trailing spaces."""
+    prompt = prompt.replace("\r\n", "\n").replace("\r", "\n")
+    return _TRAILING_SPACE.sub("\n", prompt).strip()
+
+
+def cache_key(model: str, prompt: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(model.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalize_prompt(prompt).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class LlmCache:
+    """
+    Responses of the model keyed by model name and normalized prompt, stored in SQLite.
+
+    The database file survives restarts and is shared by every worker on the host
+    (WAL mode, so readers don't block the writer). Entries older than ``ttl`` seconds
+    are treated as misses and removed lazily. Hit/miss counters are per process.
+    """
+
+    def __init__(self, path: str, ttl: int, enabled: bool = True):
+        self.path = path
+        self.ttl = ttl
+        self.enabled = enabled
+        self._conn = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Called with the lock held
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_responses ("
+                " key TEXT PRIMARY KEY, model TEXT NOT NULL, response TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def get(self, model: str, prompt: str, use_cache: bool = True) -> Optional[str]:
+        if not self.enabled:
+            return None
+        if not use_cache:
+            with self._lock:
+                self.bypassed += 1
+            return None
+        key = cache_key(model, prompt)
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            if row and time.time() - row[1] < self.ttl:
+                self.hits += 1
+                return row[0]
+            if row:
+                conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+            self.misses += 1
+            return None
+
+    def put(self, model: str, prompt: str, response: str):
+        """Store a response; bypassed requests still refresh the entry."""
+        if not self.enabled:
+            return
+        key = cache_key(model, prompt)
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO llm_responses (key, model, response, created_at) VALUES (?, ?, ?, ?)",
+                (key, model, response, time.time()),
+            )
+            self.writes += 1
+
+    def evict(self, model: str, prompt: str):
+        """Drop a response its caller couldn't use, so the next call asks the model again."""
+        if not self.enabled:
+            return
+        key = cache_key(model, prompt)
+        with self._lock:
+            if self._connection().execute("DELETE FROM llm_responses WHERE key = ?", (key,)).rowcount:
+                self.evictions += 1
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cursor = self._connection().execute(
+                "DELETE FROM llm_responses WHERE created_at < ?", (time.time() - self.ttl,)
+            )
+            return cursor.rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = 0
+            if self.enabled:
+                entries = self._connection().execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+llm_cache = LlmCache(path=LLM_CACHE_PATH, ttl=LLM_CACHE_TTL, enabled=LLM_CACHE_ENABLED)
@@ -0,0 +1,169 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from types import SimpleNamespace
+
+from dotenv import load_dotenv
+
+from LLM.cache import cache_key
+load_dotenv()
+
+# Where LLM responses come from:
+#   live   - Gemini (default)
+#   record - Gemini, and every response is appended to the cassette
+#   replay - the cassette only; no network and no GEMINI_API_TOKEN needed
+LLM_BACKEND = os.getenv("LLM_BACKEND", "live").lower()
+LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", ".cache/llm_cassette.jsonl")
+# Synthetic latency of a replayed response in seconds, or "recorded" to replay the original timing
+LLM_REPLAY_LATENCY = os.getenv("LLM_REPLAY_LATENCY", "0")
+# Off: a prompt that wasn't recorded raises CassetteMiss. On: it gets a recorded response
+# of the same prompt (file:key) instead, so a changed prompt no longer fails the run
+LLM_REPLAY_FALLBACK = os.getenv("LLM_REPLAY_FALLBACK", "false").lower() in ("1", "true", "yes")
+
+REPLAY_CHUNK_CHARS = 80  # size of the chunks a replayed stream is cut into
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when the cassette has no response for a prompt."""
+
+
+@dataclass
+class Recording:
+    key: str
+    model: str
+    label: str
+    prompt: str
+    text: str
+    latency: float
+    input_tokens: int
+    output_tokens: int
+    recorded_at: str
+
+
+def _usage(recording: Recording):
+    return SimpleNamespace(prompt_token_count=recording.input_tokens, candidates_token_count=recording.output_tokens)
+
+
+class Cassette:
+    """
+    Prompt -> response pairs in a JSONL file, one recording per line (the last
+    recording of a prompt wins). Recording wraps the live model call; replay
+    answers with objects shaped like Gemini responses, so retries, coalescing,
+    token accounting and streaming behave as they do live.
+    """
+
+    def __init__(self, path: str, latency: str, fallback: bool):
+        self.path = path
+        self.latency = latency
+        self.fallback = fallback
+        self._recordings = None  # key -> Recording, loaded on first replay
+        self._by_label = {}  # (model, label) -> keys in recording order
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.replayed = 0
+        self.fallbacks = 0
+        self.misses = 0
+
+    def load(self):
+        recordings = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        recording = Recording(**json.loads(line))
+                        recordings[recording.key] = recording
+        by_label = {}
+        for key, recording in recordings.items():
+            by_label.setdefault((recording.model, recording.label), []).append(key)
+        self._recordings, self._by_label = recordings, by_label
+
+    def find(self, model: str, prompt: str, label: str) -> Recording:
+        if self._recordings is None:
+            self.load()
+        key = cache_key(model, prompt)
+        recording = self._recordings.get(key)
+        if recording is not None:
+            return recording
+        keys = self._by_label.get((model, label))
+        if self.fallback and keys:
+            # Deterministic: the same prompt always gets the same stand-in
+            self.fallbacks += 1
+            return self._recordings[keys[int(hashlib.sha256(key.encode()).hexdigest(), 16) % len(keys)]]
+        self.misses += 1
+        raise CassetteMiss(f"No recorded response for this {label} prompt in {self.path}")
+
+    def _delay(self, recording: Recording) -> float:
+        if self.latency == "recorded":
+            return recording.latency
+        return float(self.latency)
+
+    async def replay(self, model: str, prompt: str, label: str, stream: bool = False):
+        recording = self.find(model, prompt, label)
+        self.replayed += 1
+        if not stream:
+            await asyncio.sleep(self._delay(recording))
+            return SimpleNamespace(text=recording.text, usage_metadata=_usage(recording))
+        return self._replay_stream(recording)
+
+    async def _replay_stream(self, recording: Recording):
+        chunks = [recording.text[i:i + REPLAY_CHUNK_CHARS] for i in range(0, len(recording.text), REPLAY_CHUNK_CHARS)] or [""]
+        pause = self._delay(recording) / len(chunks)
+        for index, text in enumerate(chunks):
+            await asyncio.sleep(pause)
+            last = index == len(chunks) - 1
+            yield SimpleNamespace(text=text, usage_metadata=_usage(recording) if last else None)
+
+    def _append(self, model: str, prompt: str, label: str, text: str, latency: float, usage):
+        recording = Recording(
+            key=cache_key(model, prompt),
+            model=model,
+            label=label,
+            prompt=prompt,
+            text=text,
+            latency=round(latency, 3),
+            input_tokens=getattr(usage, "prompt_token_count", None) or 0,
+            output_tokens=getattr(usage, "candidates_token_count", None) or 0,
+            recorded_at=datetime.utcnow().isoformat(),
+        )
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(asdict(recording), ensure_ascii=False) + "\n")
+            self.recorded += 1
+            if self._recordings is not None:
+                self._recordings[recording.key] = recording
+
+    async def record(self, model: str, prompt: str, label: str, request):
+        """Await the live ``request`` and store its response."""
+        start = time.monotonic()
+        response = await request
+        self._append(model, prompt, label, response.text, time.monotonic() - start, getattr(response, "usage_metadata", None))
+        return response
+
+    async def record_stream(self, model: str, prompt: str, label: str, response, start: float):
+        """Pass a live stream opened at ``start`` (monotonic) through and store it once complete."""
+        chunks, usage = [], None
+        async for chunk in response:
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            chunks.append(chunk.text)
+            yield chunk
+        self._append(model, prompt, label, "".join(chunks), time.monotonic() - start, usage)
+
+    def stats(self) -> dict:
+        return {
+            "backend": LLM_BACKEND,
+            "path": self.path,
+            "recordings": None if self._recordings is None else len(self._recordings),
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "fallbacks": self.fallbacks,
+            "misses": self.misses,
+        }
+
+
+cassette = Cassette(path=LLM_CASSETTE_PATH, latency=LLM_REPLAY_LATENCY, fallback=LLM_REPLAY_FALLBACK)
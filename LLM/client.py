@@ -0,0 +1,370 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, Callable, Optional
+
+import google.generativeai as genai
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from dotenv import load_dotenv
+
+from LLM.cache import cache_key, llm_cache
+from LLM.cassette import LLM_BACKEND, cassette
+from LLM.prompt_budget import estimate_tokens
+from LLM.resilience import (
+    LLM_ATTEMPT_TIMEOUT, LLM_BREAKER_RESET, LLM_BREAKER_THRESHOLD, LLM_HEDGE_ENABLED, LLM_MAX_RETRIES, RETRYABLE_ERRORS,
+    CircuitBreaker, CircuitOpen, DeadlineExceeded, LatencyTracker, attempt_timeout, backoff_delay, time_left,
+)
+from metrics import current_node, llm_call_duration, llm_calls, llm_tokens
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+GEMINI_API_TOKEN = os.getenv("GEMINI_API_TOKEN")
+if GEMINI_API_TOKEN:
+    genai.configure(api_key=GEMINI_API_TOKEN)
+elif LLM_BACKEND != "replay":
+    raise ValueError("GEMINI_API_TOKEN environment variable not set (not needed with LLM_BACKEND=replay)")
+
+MODEL_NAME = 'gemini-2.0-flash-exp'  # Or 'gemini-pro-vision' for multimodal
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "8"))
+
+
+def upstream_error(e: Exception) -> HTTPException:
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, CircuitOpen):
+        return HTTPException(status_code=503, detail=str(e))
+    if isinstance(e, (DeadlineExceeded, asyncio.TimeoutError)):
+        return HTTPException(status_code=504, detail="Gemini API call timed out")
+    return HTTPException(status_code=500, detail=f"Gemini API call failed: {str(e)}")
+
+
+class LlmClient:
+    """
+    Shared async access to Gemini.
+
+    Model instances are created once per model name. At most ``max_in_flight``
+    generations run at a time; the rest wait on the semaphore. A prompt that is
+    already being generated is not sent again: concurrent identical calls (double
+    clicks, client retries) await the same upstream request.
+
+    Each call gets the deadline left (see LLM/resilience.py), retryable errors are
+    retried with jittered backoff, a slow call may be hedged with a second identical
+    request, and a circuit breaker fails fast while Gemini keeps failing.
+
+    Input and output tokens of every upstream call are taken from the response
+    usage metadata and added up per ``label`` (the prompt name).
+
+    A response is only cached once the caller's ``parse`` accepted it, so a
+    malformed answer is never served again from the cache.
+    """
+
+    def __init__(self, max_in_flight: int):
+        self.max_in_flight = max_in_flight
+        self._models = {}
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._in_flight = {}  # cache key -> task of the upstream call
+        self.calls = 0
+        self.coalesced = 0
+        self.failed = 0
+        self.retries = 0
+        self.hedged = 0
+        self.hedge_wins = 0  # hedges that answered before the original request
+        self.latency = LatencyTracker()
+        self.breaker = CircuitBreaker(threshold=LLM_BREAKER_THRESHOLD, reset=LLM_BREAKER_RESET)
+        self.usage = {}  # label -> calls and tokens
+
+    def model(self, name: str) -> genai.GenerativeModel:
+        model = self._models.get(name)
+        if model is None:
+            model = self._models[name] = genai.GenerativeModel(name)
+        return model
+
+    def _record_usage(self, label: str, model: str, prompt: str, usage):
+        input_tokens = getattr(usage, "prompt_token_count", None) or 0
+        output_tokens = getattr(usage, "candidates_token_count", None) or 0
+        entry = self.usage.setdefault(label, {
+            "calls": 0, "input_tokens": 0, "output_tokens": 0, "estimated_input_tokens": 0, "prompt_chars": 0,
+        })
+        entry["calls"] += 1
+        entry["input_tokens"] += input_tokens
+        entry["output_tokens"] += output_tokens
+        entry["estimated_input_tokens"] += estimate_tokens(prompt)
+        entry["prompt_chars"] += len(prompt)
+        node = current_node()
+        llm_tokens.inc(input_tokens, node=node, prompt=label, direction="input")
+        llm_tokens.inc(output_tokens, node=node, prompt=label, direction="output")
+        logger.info("%s on %s: %d input tokens, %d output tokens", label, model, input_tokens, output_tokens)
+
+    async def generate(self, prompt: str, model: str = MODEL_NAME, use_cache: bool = True, label: str = "other",
+                       parse: Optional[Callable[[str], Any]] = None):
+        """
+        The model's response to ``prompt``, or ``parse(response)`` when a parser is
+        given. Whatever ``parse`` raises reaches the caller, and the response is not cached.
+        """
+        # When recording, every prompt has to reach Gemini to end up in the cassette
+        use_cache = use_cache and LLM_BACKEND != "record"
+        cached = await run_in_threadpool(llm_cache.get, model, prompt, use_cache)
+        if cached is not None:
+            try:
+                result = cached if parse is None else parse(cached)
+            except Exception:
+                # Cached before its caller validated it; ask the model again
+                await run_in_threadpool(llm_cache.evict, model, prompt)
+            else:
+                llm_calls.inc(node=current_node(), prompt=label, source="cache")
+                return result
+
+        key = cache_key(model, prompt)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._call(model, prompt, label, parse))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+            llm_calls.inc(node=current_node(), prompt=label, source="coalesced")
+        # One caller giving up must not cancel the call the others are waiting on
+        text = await asyncio.shield(task)
+        return text if parse is None else parse(text)
+
+    async def _call(self, model: str, prompt: str, label: str, parse: Optional[Callable[[str], Any]] = None) -> str:
+        node = current_node()
+        start = time.monotonic()
+        try:
+            response = await self._with_retries(model, prompt, label)
+            generated_text = response.text.strip()
+        except Exception as e:
+            llm_calls.inc(node=node, prompt=label, source="error")
+            raise upstream_error(e)
+        finally:
+            llm_call_duration.observe(time.monotonic() - start, node=node, prompt=label)
+        llm_calls.inc(node=node, prompt=label, source="upstream")
+        self._record_usage(label, model, prompt, getattr(response, "usage_metadata", None))
+        if parse is not None:
+            parse(generated_text)  # raises to every waiting caller; nothing is cached
+        await run_in_threadpool(llm_cache.put, model, prompt, generated_text)
+        return generated_text
+
+    async def _with_retries(self, model: str, prompt: str, label: str):
+        """Retry retryable upstream errors with jittered exponential backoff, within the deadline."""
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            try:
+                return await self._hedged(model, prompt, label)
+            except RETRYABLE_ERRORS:
+                delay = backoff_delay(attempt)
+                left = time_left()
+                if attempt == LLM_MAX_RETRIES or (left is not None and left <= delay):
+                    raise
+                self.retries += 1
+                await asyncio.sleep(delay)
+
+    async def _hedged(self, model: str, prompt: str, label: str):
+        """
+        One attempt, plus an identical second one if the first is still running
+        after the recent p95 latency; the first successful response wins.
+        """
+        delay = self.latency.hedge_delay() if LLM_HEDGE_ENABLED else None
+        if delay is None:
+            return await self._attempt(model, prompt, label)
+
+        first = asyncio.ensure_future(self._attempt(model, prompt, label))
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+
+        self.hedged += 1
+        second = asyncio.ensure_future(self._attempt(model, prompt, label))
+        pending = {first, second}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self.hedge_wins += task is second
+                        return task.result()
+            # Both failed; report the original request's error
+            return first.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _request(self, model: str, prompt: str, label: str, stream: bool = False):
+        """The Gemini response to ``prompt``, or its recording in replay mode."""
+        if LLM_BACKEND == "replay":
+            return await cassette.replay(model, prompt, label, stream)
+        request = self.model(model).generate_content_async(prompt, stream=True) if stream else self.model(model).generate_content_async(prompt)
+        if LLM_BACKEND != "record":
+            return await request
+        if stream:
+            start = time.monotonic()
+            return cassette.record_stream(model, prompt, label, await request, start)
+        return await cassette.record(model, prompt, label, request)
+
+    @asynccontextmanager
+    async def _slot(self):
+        """Hold one of the ``max_in_flight`` slots, waiting no longer than the deadline left."""
+        left = time_left()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), None if left is None else max(0.0, left))
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded("LLM deadline exceeded waiting for a free slot")
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+
+    async def _attempt(self, model: str, prompt: str, label: str):
+        async with self._slot():
+            start = time.monotonic()
+            response = await self._upstream(model, prompt, label)
+        self.latency.add(time.monotonic() - start)
+        return response
+
+    async def _upstream(self, model: str, prompt: str, label: str, stream: bool = False):
+        """One upstream request within the attempt timeout; its outcome goes to the circuit breaker."""
+        timeout = attempt_timeout()
+        # Last step before the try, so a half-open trial always ends in one of the branches below
+        self.breaker.before_call()
+        self.calls += 1
+        try:
+            response = await asyncio.wait_for(self._request(model, prompt, label, stream=stream), timeout)
+        except asyncio.TimeoutError:
+            self.failed += 1
+            if timeout < LLM_ATTEMPT_TIMEOUT:
+                # Cut short by the request deadline, which says nothing about the upstream
+                self.breaker.release()
+            else:
+                self.breaker.record_failure()
+            raise
+        except RETRYABLE_ERRORS:
+            self.failed += 1
+            self.breaker.record_failure()
+            raise
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except Exception:
+            # Not the upstream being unhealthy (invalid request, blocked prompt...)
+            self.failed += 1
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+        return response
+
+    async def stream(self, prompt: str, model: str = MODEL_NAME, use_cache: bool = True, label: str = "other",
+                     validate: Optional[Callable[[str], Any]] = None):
+        """
+        Yield the response text as the model generates it. A cached response is
+        yielded in one piece. Streams are not coalesced: every caller gets its own call,
+        and only the opening request is retried, never a stream that already produced text.
+        The complete text is cached only if ``validate`` doesn't raise; what it raises
+        ends the stream.
+        """
+        use_cache = use_cache and LLM_BACKEND != "record"
+        cached = await run_in_threadpool(llm_cache.get, model, prompt, use_cache)
+        if cached is not None:
+            try:
+                if validate is not None:
+                    validate(cached)
+            except Exception:
+                await run_in_threadpool(llm_cache.evict, model, prompt)
+            else:
+                llm_calls.inc(node=current_node(), prompt=label, source="cache")
+                yield cached
+                return
+
+        chunks = []
+        node = current_node()
+        start = time.monotonic()
+        # The upstream is read by its own task, which holds the LLM slot only while the
+        # model produces; a slow client drains the queue without keeping the slot.
+        queue = asyncio.Queue()
+        reader = asyncio.ensure_future(self._read_stream(model, prompt, label, queue))
+        try:
+            while (text := await queue.get()) is not None:
+                chunks.append(text)
+                yield text
+            usage = await reader
+        except Exception as e:
+            llm_calls.inc(node=node, prompt=label, source="error")
+            llm_call_duration.observe(time.monotonic() - start, node=node, prompt=label)
+            raise upstream_error(e)
+        finally:
+            # No-op once the stream is complete; stops the upstream read if the client went away
+            reader.cancel()
+        llm_calls.inc(node=node, prompt=label, source="upstream")
+        llm_call_duration.observe(time.monotonic() - start, node=node, prompt=label)
+        self._record_usage(label, model, prompt, usage)
+        text = "".join(chunks).strip()
+        if validate is not None:
+            validate(text)
+        await run_in_threadpool(llm_cache.put, model, prompt, text)
+
+    async def _read_stream(self, model: str, prompt: str, label: str, queue: asyncio.Queue):
+        """Put the text chunks of a streamed response in ``queue``, then None; returns the usage metadata."""
+        usage = None
+        response = None
+        try:
+            async with AsyncExitStack() as slot:
+                response = await self._open_stream(model, prompt, label, slot)
+                iterator = aiter(response)
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(anext(iterator), attempt_timeout())
+                    except StopAsyncIteration:
+                        return usage
+                    # Usage metadata is complete on the last chunk
+                    usage = getattr(chunk, "usage_metadata", None) or usage
+                    queue.put_nowait(chunk.text)
+        except Exception:
+            if response is not None:
+                self.failed += 1  # failed mid-stream; failed attempts to open it are already counted
+            raise
+        finally:
+            queue.put_nowait(None)
+
+    async def _open_stream(self, model: str, prompt: str, label: str, slot: AsyncExitStack):
+        """
+        Open a streamed response, retrying like ``_with_retries``. Each attempt takes
+        an LLM slot, so none is held during the backoff; the one of the attempt that
+        succeeded stays held until ``slot`` is closed.
+        """
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            try:
+                async with AsyncExitStack() as attempt_slot:
+                    await attempt_slot.enter_async_context(self._slot())
+                    response = await self._upstream(model, prompt, label, stream=True)
+                    await slot.enter_async_context(attempt_slot.pop_all())
+                    return response
+            except RETRYABLE_ERRORS:
+                delay = backoff_delay(attempt)
+                left = time_left()
+                if attempt == LLM_MAX_RETRIES or (left is not None and left <= delay):
+                    raise
+                self.retries += 1
+                await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": len(self._in_flight),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "failed": self.failed,
+            "retries": self.retries,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "latency_p50": self.latency.quantile(0.5),
+            "latency_p95": self.latency.quantile(0.95),
+            "breaker": self.breaker.stats(),
+            "input_tokens": sum(entry["input_tokens"] for entry in self.usage.values()),
+            "output_tokens": sum(entry["output_tokens"] for entry in self.usage.values()),
+            "usage": self.usage,
+        }
+
+
+llm_client = LlmClient(max_in_flight=LLM_MAX_IN_FLIGHT)
@@ -1,16 +1,22 @@
-import json
-from pathlib import Path
-from LLM.load_prompt import load_prompt
-from LLM.utils import get_prompt
-from schemas import ResumeCreate
+from LLM.prompt_registry import prompt_registry, resume_schema_json
 
 def build_resume_prompt(profile_data: dict, hr_key_points: dict) -> str:
-    schema = ResumeCreate.model_json_schema()
-    return load_prompt(
-        prompt_file=get_prompt("build_resume.yaml"),
-        prompt_key='prompt',
+    return prompt_registry.render(
+        "build_resume.yaml",
+        "prompt",
         profile_data=profile_data,
         hr_key_points=hr_key_points,
-        schema=schema
+        schema=resume_schema_json()
     )
 
+def build_rewrite_prompt(profile_data: dict, hr_key_points: dict, resume: dict, feedback: dict) -> str:
+    """Prompt regenerating only the sections named in ``feedback`` (ResumeCreate field -> evaluator remark)."""
+    return prompt_registry.render(
+        "build_resume.yaml",
+        "rewrite_sections",
+        profile_data=profile_data,
+        hr_key_points=hr_key_points,
+        resume=resume,
+        feedback=feedback,
+        schema=resume_schema_json(tuple(sorted(feedback)))
+    )
@@ -0,0 +1,64 @@
+import hashlib
+from typing import Optional
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from database import AsyncSessionLocal
+from models import JobDescriptionAnalysis
+
+
+KEY_POINT_FIELDS = ("skills", "expectations")
+
+
+def validate_key_points(value) -> dict:
+    """``{"skills": [str], "expectations": [str]}`` out of an analysis, or ValueError; other keys are dropped."""
+    if not isinstance(value, dict):
+        raise ValueError(f"key points must be a JSON object, got {type(value).__name__}")
+    key_points = {}
+    for field in KEY_POINT_FIELDS:
+        items = value.get(field)
+        if not isinstance(items, list) or not all(isinstance(item, str) for item in items):
+            raise ValueError(f"key points need a list of strings under '{field}'")
+        key_points[field] = items
+    return key_points
+
+
+def fingerprint(job_description: str) -> str:
+    """Same posting, same fingerprint, whatever the casing, spacing or line breaks it was pasted with."""
+    folded = " ".join(job_description.split()).casefold()
+    return hashlib.sha256(folded.encode("utf-8")).hexdigest()
+
+
+async def find_key_points(job_description: str) -> Optional[dict]:
+    """The stored analysis of the posting; None when there is none or it is malformed (it gets replaced)."""
+    async with AsyncSessionLocal() as db:
+        stored = (await db.execute(
+            select(JobDescriptionAnalysis.key_points)
+            .where(JobDescriptionAnalysis.fingerprint == fingerprint(job_description))
+        )).scalar()
+    try:
+        return None if stored is None else validate_key_points(stored)
+    except ValueError:
+        return None
+
+
+async def save_key_points(job_description: str, key_points: dict):
+    """Store an analysis, replacing the previous one of the same posting. Stored analyses don't expire,
+    so only well-formed ones are accepted."""
+    key_points = validate_key_points(key_points)
+    key = fingerprint(job_description)
+    async with AsyncSessionLocal() as db:
+        # New postings are the common case, so try the INSERT first
+        try:
+            await db.execute(insert(JobDescriptionAnalysis).values(fingerprint=key, key_points=key_points))
+            await db.commit()
+            return
+        except IntegrityError:
+            await db.rollback()
+        await db.execute(
+            update(JobDescriptionAnalysis)
+            .where(JobDescriptionAnalysis.fingerprint == key)
+            .values(key_points=key_points)
+        )
+        await db.commit()
@@ -2,6 +2,8 @@ import yaml
 import json
 from pathlib import Path
 
+from LLM.prompt_registry import prompt_registry
+
 def load_prompt(prompt_file: str, prompt_key: str, **variables) -> str:
     """
     Load a prompt template from a YAML file and format it with the provided variables.
@@ -17,6 +19,11 @@ def load_prompt(prompt_file: str, prompt_key: str, **variables) -> str:
     Raises:
         ValueError: If the prompt key is not found or a required variable is missing.
     """
+    # Prompts of LLM/prompt are served by the registry, already parsed
+    path = Path(prompt_file)
+    if path.parent.resolve() == prompt_registry.directory.resolve():
+        return prompt_registry.render(path.name, prompt_key, **variables)
+
     # Load the YAML file
     try:
         with open(prompt_file, 'r', encoding='utf-8') as file:
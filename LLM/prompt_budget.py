@@ -0,0 +1,159 @@
+import json
+import logging
+import math
+import os
+from typing import Callable, Dict, Optional
+
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Compact mode: minified JSON, schema without titles, long descriptions capped
+PROMPT_COMPACT = os.getenv("PROMPT_COMPACT", "false").lower() in ("1", "true", "yes")
+PROMPT_MAX_DESCRIPTION_CHARS = int(os.getenv("PROMPT_MAX_DESCRIPTION_CHARS", "600"))
+# Estimated input tokens allowed per prompt, 0 for no limit
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "0"))
+# Per-prompt overrides, e.g. "optimize.yaml:prompt=6000,agents.yaml:eval_prompt=3000"
+PROMPT_TOKEN_BUDGETS = os.getenv("PROMPT_TOKEN_BUDGETS", "")
+
+CHARS_PER_TOKEN = 4  # rough average for Gemini on English/French text and JSON
+# Free-text fields shortened by compact mode and, in this order of caps, when a prompt is over budget
+TRIMMED_FIELDS = ("description", "summary")
+# Only variables the model reads as context get their fields capped; a profile or resume
+# the model has to give back (optimize, rewrite, generation) is always sent whole
+CAPPED_VARIABLES = ("hr_key_points", "key_points")
+CAPPED_PROMPT_VARIABLES = {"agents.yaml:eval_prompt": ("resume",)}
+# Plain-text prompt variables that may be cut as a last resort, never below MIN_TRIMMED_TEXT_CHARS
+TRIMMED_VARIABLES = ("job_desc", "job_description")
+MIN_TRIMMED_TEXT_CHARS = 800
+TRIM_STEPS = (400, 200, 100, 50)
+ELLIPSIS = "…"
+
+
+def parse_budgets(value: str) -> Dict[str, int]:
+    budgets = {}
+    for item in value.split(","):
+        name, _, budget = item.strip().rpartition("=")
+        if name and budget.strip().isdigit():
+            budgets[name.strip()] = int(budget)
+    return budgets
+
+
+_budgets = parse_budgets(PROMPT_TOKEN_BUDGETS)
+
+
+def token_budget(name: str) -> int:
+    """Budget of a prompt named ``file:key``; 0 when unlimited."""
+    return _budgets.get(name, PROMPT_TOKEN_BUDGET)
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def to_json(value, compact: bool = PROMPT_COMPACT) -> str:
+    if compact:
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+    return json.dumps(value, indent=2, ensure_ascii=False)
+
+
+def cap_text(text: str, max_chars: int) -> str:
+    """Cut at the last word boundary before ``max_chars``."""
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    if len(cut.split()) > 1 and not text[max_chars].isspace():
+        cut = cut.rsplit(None, 1)[0]
+    return cut.rstrip(" ,.;:") + ELLIPSIS
+
+
+def cap_descriptions(value, max_chars: Optional[int]):
+    """Copy of ``value`` with every description/summary string capped to ``max_chars``."""
+    if max_chars is None:
+        return value
+    if isinstance(value, dict):
+        return {
+            key: cap_text(item, max_chars) if key in TRIMMED_FIELDS and isinstance(item, str)
+            else cap_descriptions(item, max_chars)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [cap_descriptions(item, max_chars) for item in value]
+    return value
+
+
+def compact_schema(schema):
+    """
+    JSON schema without what the model doesn't need: titles, null defaults, and
+    ``anyOf: [X, null]`` written as a nullable type.
+    """
+    if isinstance(schema, list):
+        return [compact_schema(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+    compacted = {}
+    for key, value in schema.items():
+        if key == "title" and isinstance(value, str):
+            continue
+        if key == "default" and value in (None, [], {}):
+            continue
+        if key == "properties":
+            # property names are data here, "title" included
+            compacted[key] = {name: compact_schema(item) for name, item in value.items()}
+        else:
+            compacted[key] = compact_schema(value)
+    options = compacted.get("anyOf")
+    if isinstance(options, list) and len(options) == 2 and {"type": "null"} in options:
+        other = options[0] if options[1] == {"type": "null"} else options[1]
+        if isinstance(other.get("type"), str):
+            del compacted["anyOf"]
+            compacted = {**other, **compacted, "type": [other["type"], "null"]}
+    return compacted
+
+
+def fit_to_budget(name: str, format_prompt: Callable[[dict], str], variables: dict) -> str:
+    """
+    Format a prompt, serializing dict variables as JSON, and trim it deterministically
+    while it is over the budget of ``name``: description caps of the context variables
+    are tightened step by step, then the job description is cut down to
+    MIN_TRIMMED_TEXT_CHARS. A prompt that can't be brought under budget is sent at
+    its smallest and logged.
+    """
+    budget = token_budget(name)
+    cap = PROMPT_MAX_DESCRIPTION_CHARS if PROMPT_COMPACT else None
+    capped = CAPPED_VARIABLES + CAPPED_PROMPT_VARIABLES.get(name, ())
+
+    def render(max_chars, text_limit=None):
+        values = {}
+        for key, value in variables.items():
+            if isinstance(value, (dict, list)):
+                value = to_json(cap_descriptions(value, max_chars) if key in capped else value)
+            elif text_limit is not None and key in TRIMMED_VARIABLES and isinstance(value, str):
+                value = cap_text(value, text_limit)
+            values[key] = value
+        return format_prompt(values)
+
+    prompt = render(cap)
+    if not budget or estimate_tokens(prompt) <= budget:
+        return prompt
+
+    before = estimate_tokens(prompt)
+    for step in TRIM_STEPS:
+        if cap is not None and step >= cap:
+            continue
+        prompt = render(step)
+        if estimate_tokens(prompt) <= budget:
+            logger.info("%s trimmed from ~%d to ~%d tokens (descriptions capped at %d chars)",
+                        name, before, estimate_tokens(prompt), step)
+            return prompt
+
+    # Still over: cut the job description to what's left
+    text = next((variables[key] for key in TRIMMED_VARIABLES if isinstance(variables.get(key), str)), None)
+    if text:
+        excess = (estimate_tokens(prompt) - budget) * CHARS_PER_TOKEN
+        floor = TRIM_STEPS[-1] if cap is None else min(cap, TRIM_STEPS[-1])
+        prompt = render(floor, max(MIN_TRIMMED_TEXT_CHARS, len(text) - excess))
+    level = logging.INFO if estimate_tokens(prompt) <= budget else logging.WARNING
+    logger.log(level, "%s trimmed from ~%d to ~%d tokens, budget is %d", name, before, estimate_tokens(prompt), budget)
+    return prompt
@@ -0,0 +1,141 @@
+import os
+import string
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import FrozenSet, Optional, Tuple
+
+import yaml
+from dotenv import load_dotenv
+
+from LLM.prompt_budget import PROMPT_COMPACT, compact_schema, fit_to_budget, to_json
+from schemas import ResumeCreate
+load_dotenv()
+
+PROMPTS_DIR = os.getenv("PROMPTS_DIR", str(Path(__file__).parent / "prompt"))
+# Re-read prompt files when they change on disk (a stat per render); meant for development
+PROMPTS_AUTO_RELOAD = os.getenv("PROMPTS_AUTO_RELOAD", "false").lower() in ("1", "true", "yes")
+
+
+class UnknownPrompt(ValueError):
+    """Raised when a prompt file or key does not exist."""
+
+
+class InvalidPrompt(ValueError):
+    """Raised when a prompt template can't be parsed, or a placeholder has no value."""
+
+
+@dataclass
+class _Prompt:
+    template: Optional[str]
+    placeholders: FrozenSet[str]
+    error: Optional[str] = None
+
+
+@dataclass
+class _File:
+    mtime: float
+    prompts: dict
+
+
+def _compile(template) -> _Prompt:
+    if not isinstance(template, str):
+        return _Prompt(None, frozenset(), error="prompt is not a string")
+    try:
+        fields = {name for _, name, _, _ in string.Formatter().parse(template) if name is not None}
+    except ValueError as e:
+        return _Prompt(None, frozenset(), error=str(e))
+    if "" in fields or any(not name.isidentifier() for name in fields):
+        return _Prompt(None, frozenset(), error="placeholders must be named, e.g. {job_desc}")
+    return _Prompt(template, frozenset(fields))
+
+
+class PromptRegistry:
+    """
+    Every ``*.yaml`` prompt file parsed once, with the placeholders of each prompt
+    extracted and checked up front.
+
+    A request only pays for ``str.format``. When auto reload is on, a file whose
+    mtime changed is re-parsed on its next use, so prompts can be edited without a
+    restart. A broken template is reported when it is used rather than at import.
+    """
+
+    def __init__(self, directory: str, auto_reload: bool):
+        self.directory = Path(directory)
+        self.auto_reload = auto_reload
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def _load(self, filename: str, mtime: float) -> _File:
+        with open(self.directory / filename, "r", encoding="utf-8") as file:
+            prompts = yaml.safe_load(file) or {}
+        return _File(mtime=mtime, prompts={key: _compile(template) for key, template in prompts.items()})
+
+    def warm(self):
+        """Parse every prompt file in the directory."""
+        files = {}
+        for path in sorted(self.directory.glob("*.yaml")):
+            files[path.name] = self._load(path.name, path.stat().st_mtime)
+        with self._lock:
+            self._files = files
+
+    def _file(self, filename: str) -> _File:
+        with self._lock:
+            entry = self._files.get(filename)
+        if entry is not None and not self.auto_reload:
+            return entry
+        try:
+            mtime = (self.directory / filename).stat().st_mtime
+        except FileNotFoundError:
+            raise UnknownPrompt(f"YAML file not found: {self.directory / filename}")
+        if entry is None or entry.mtime != mtime:
+            entry = self._load(filename, mtime)
+            with self._lock:
+                self._files[filename] = entry
+        return entry
+
+    def placeholders(self, filename: str, key: str) -> FrozenSet[str]:
+        return self._get(filename, key).placeholders
+
+    def _get(self, filename: str, key: str) -> _Prompt:
+        prompt = self._file(filename).prompts.get(key)
+        if prompt is None:
+            raise UnknownPrompt(f"Prompt key '{key}' not found in {filename}")
+        if prompt.error:
+            raise InvalidPrompt(f"Prompt '{key}' in {filename} is invalid: {prompt.error}")
+        return prompt
+
+    def render(self, filename: str, key: str, **variables) -> str:
+        """
+        Format a prompt. Dict and list values are rendered as JSON (minified in
+        compact mode) and the result is trimmed to the prompt's token budget.
+        """
+        prompt = self._get(filename, key)
+        missing = prompt.placeholders - variables.keys()
+        if missing:
+            raise InvalidPrompt(f"Missing variable for placeholder: {', '.join(sorted(missing))}")
+        return fit_to_budget(
+            f"{filename}:{key}",
+            lambda values: prompt.template.format(**values),
+            {name: value for name, value in variables.items() if name in prompt.placeholders},
+        )
+
+
+@lru_cache(maxsize=None)
+def resume_schema(sections: Optional[Tuple[str, ...]] = None) -> dict:
+    """ResumeCreate JSON schema, optionally restricted to some sections. Treat as read-only."""
+    schema = ResumeCreate.model_json_schema()
+    if sections is not None:
+        schema["properties"] = {section: schema["properties"][section] for section in sections}
+        schema["required"] = list(sections)
+    return schema
+
+
+@lru_cache(maxsize=None)
+def resume_schema_json(sections: Optional[Tuple[str, ...]] = None) -> str:
+    schema = resume_schema(sections)
+    return to_json(compact_schema(schema) if PROMPT_COMPACT else schema)
+
+
+prompt_registry = PromptRegistry(directory=PROMPTS_DIR, auto_reload=PROMPTS_AUTO_RELOAD)
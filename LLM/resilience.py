@@ -0,0 +1,161 @@
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from google.api_core import exceptions as google_exceptions
+from dotenv import load_dotenv
+load_dotenv()
+
+# Time a request may spend on LLM calls, split across the nodes of the resume graph
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "120"))
+# Upper bound of a single upstream attempt, whatever the deadline left
+LLM_ATTEMPT_TIMEOUT = float(os.getenv("LLM_ATTEMPT_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "8"))
+# Hedging: a second identical request once the first is slower than the recent p95
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() in ("1", "true", "yes")
+LLM_HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", "0.95"))
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "1"))
+LLM_HEDGE_MIN_SAMPLES = 20
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30"))
+
+# Upstream errors worth another attempt: overload, rate limiting, 5xx, timeouts, dropped connections
+RETRYABLE_ERRORS = (
+    google_exceptions.TooManyRequests,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServerError,
+    google_exceptions.DeadlineExceeded,
+    asyncio.TimeoutError,
+    ConnectionError,
+)
+
+_deadline = ContextVar("llm_deadline", default=None)  # monotonic time
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the request has no time left for an LLM call."""
+
+
+class CircuitOpen(Exception):
+    """Raised without calling the upstream while the circuit breaker is open."""
+
+
+@contextmanager
+def llm_deadline(seconds: float = LLM_DEADLINE):
+    """Give the LLM calls made inside the block ``seconds`` in total; nested deadlines only shorten it."""
+    expires_at = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(expires_at if current is None else min(current, expires_at))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_left() -> Optional[float]:
+    """Seconds left before the current deadline, None without one."""
+    expires_at = _deadline.get()
+    return None if expires_at is None else expires_at - time.monotonic()
+
+
+@contextmanager
+def deadline_share(parts: int):
+    """
+    Narrow the deadline to 1/``parts`` of the time left, e.g. a graph node with
+    two more LLM calls expected after its own takes a third. No-op without a deadline.
+    """
+    left = time_left()
+    if left is None:
+        yield
+        return
+    with llm_deadline(max(0.0, left) / max(1, parts)):
+        yield
+
+
+def attempt_timeout() -> float:
+    left = time_left()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("LLM deadline exceeded")
+    return LLM_ATTEMPT_TIMEOUT if left is None else min(LLM_ATTEMPT_TIMEOUT, left)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full jitter: uniform between 0 and the exponential backoff of ``attempt`` (0-based)."""
+    return random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * 2 ** attempt))
+
+
+class LatencyTracker:
+    """Recent successful call durations, for the hedging delay."""
+
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def hedge_delay(self) -> Optional[float]:
+        """None until there are enough samples to know what slow means."""
+        if len(self._samples) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return max(LLM_HEDGE_MIN_DELAY, self.quantile(LLM_HEDGE_QUANTILE))
+
+
+class CircuitBreaker:
+    """
+    Opens after ``threshold`` consecutive retryable failures and then rejects calls
+    for ``reset`` seconds. After that a single trial call is let through (half
+    open): its success closes the breaker, its failure opens it again.
+    """
+
+    def __init__(self, threshold: int, reset: float):
+        self.threshold = threshold
+        self.reset = reset
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset else "open"
+
+    def before_call(self):
+        state = self.state
+        if state == "open" or (state == "half_open" and self.trial_running):
+            self.rejected += 1
+            raise CircuitOpen("Gemini is unavailable, retry later")
+        if state == "half_open":
+            self.trial_running = True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.trial_running or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+        self.trial_running = False
+
+    def release(self):
+        """The call ended without telling anything about the upstream (cancelled, client error)."""
+        self.trial_running = False
+
+    def stats(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.failures, "rejected": self.rejected}
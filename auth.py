@@ -1,30 +1,43 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
 from models import User
 from schemas import UserCreate, Token
-from utils import get_current_user, get_password_hash, verify_password, create_access_token
+from utils import get_current_user, create_access_token
+from user_cache import CurrentUser, user_cache
+from password_hashing import password_hasher
 from datetime import timedelta
 router = APIRouter()
 
+# bcrypt runs on the password hashing pool and the database is async, so none of
+# these endpoints hold a threadpool slot.
+
+async def find_user(db: AsyncSession, *criteria):
+    return (await db.execute(select(User).where(*criteria))).scalars().first()
+
+async def save(db: AsyncSession, obj):
+    db.add(obj)
+    await db.commit()
+    await db.refresh(obj)
+    return obj
+
 @router.post("/register", response_model=Token)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    db_user = await find_user(db, User.email == user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await password_hasher.hash(user.password)
     new_user = User(name=user.name, email=user.email, hashed_password=hashed_password)
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await save(db, new_user)
     access_token = create_access_token(data={"sub": new_user.email})
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = await find_user(db, User.email == form_data.username)
+    if not user or not await password_hasher.verify(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -34,9 +47,11 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/password-update")
-def update_password(current_password: str, new_password: str, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    if not verify_password(current_password, user.hashed_password):
+async def update_password(current_password: str, new_password: str, db: AsyncSession = Depends(get_async_db), current_user: CurrentUser = Depends(get_current_user)):
+    user = await find_user(db, User.id == current_user.id)
+    if not user or not await password_hasher.verify(current_password, user.hashed_password):
         raise HTTPException(status_code=400, detail="Incorrect current password")
-    user.hashed_password = get_password_hash(new_password)
-    db.commit()
-    return {"message": "Password updated successfully"}
\ No newline at end of file
+    user.hashed_password = await password_hasher.hash(new_password)
+    await save(db, user)
+    user_cache.invalidate_user(user.id)
+    return {"message": "Password updated successfully"}
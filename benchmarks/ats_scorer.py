@@ -0,0 +1,97 @@
+"""
+Local ATS scorer vs the LLM judge.
+
+Reads a JSONL dataset, one case per line:
+
+    {"resume": {...ResumeCreate...}, "job_description": "...",
+     "key_points": {"skills": [...], "expectations": [...]},   # optional
+     "llm_score": 82}                                          # optional
+
+Missing key points are extracted and missing LLM scores are requested from
+Gemini (through the LLM cache, so re-runs are free). Reports local scoring time,
+agreement with the LLM (MAE, Pearson, pass/fail at the graph's threshold) and how
+many LLM calls hybrid mode would have saved.
+
+    python -m benchmarks.ats_scorer --dataset cases.jsonl
+
+No dataset ships with the repo, so the default ATS_HYBRID_LOW/HIGH band (60-80)
+is uncalibrated. Collect real resume/posting pairs, run this, and set the band to
+where the local and LLM verdicts disagree before switching ATS_EVALUATOR to hybrid.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from LLM.agents import extract_key_points, llm_ats_evaluation
+from LLM.ats_scorer import ATS_HYBRID_HIGH, ATS_HYBRID_LOW, is_borderline, score_resume
+
+PASS_SCORE = 70  # the graph's router accepts a resume at this score
+
+
+def pearson(xs, ys):
+    if len(xs) < 2 or statistics.pstdev(xs) == 0 or statistics.pstdev(ys) == 0:
+        return float("nan")
+    mean_x, mean_y = statistics.fmean(xs), statistics.fmean(ys)
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    return covariance / (len(xs) * statistics.pstdev(xs) * statistics.pstdev(ys))
+
+
+async def load_cases(path):
+    cases = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            case = json.loads(line)
+            if "key_points" not in case:
+                case["key_points"] = await extract_key_points(case["job_description"])
+            if "llm_score" not in case:
+                case["llm_score"], _ = await llm_ats_evaluation(case["resume"], case["job_description"])
+            cases.append(case)
+    return cases
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", required=True)
+    parser.add_argument("--repeat", type=int, default=100, help="local scoring repetitions per case for timing")
+    args = parser.parse_args()
+
+    cases = await load_cases(args.dataset)
+    if not cases:
+        sys.exit("empty dataset")
+
+    local_scores, timings = [], []
+    for case in cases:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            result = score_resume(case["resume"], case["key_points"])
+        timings.append((time.perf_counter() - start) / args.repeat)
+        local_scores.append(result.score)
+    llm_scores = [case["llm_score"] for case in cases]
+
+    errors = [abs(local - llm) for local, llm in zip(local_scores, llm_scores)]
+    same_verdict = sum((local >= PASS_SCORE) == (llm >= PASS_SCORE) for local, llm in zip(local_scores, llm_scores))
+    borderline = sum(is_borderline(score) for score in local_scores)
+    hybrid_scores = [llm if is_borderline(local) else local for local, llm in zip(local_scores, llm_scores)]
+    hybrid_verdict = sum((hybrid >= PASS_SCORE) == (llm >= PASS_SCORE) for hybrid, llm in zip(hybrid_scores, llm_scores))
+
+    print(f"cases                 {len(cases)}")
+    print(f"local score time      {statistics.fmean(timings) * 1000:.3f} ms avg, {max(timings) * 1000:.3f} ms max")
+    print(f"MAE vs LLM            {statistics.fmean(errors):.1f} points")
+    print(f"Pearson r             {pearson(local_scores, llm_scores):.3f}")
+    print(f"pass/fail agreement   local {same_verdict / len(cases):.1%}   hybrid {hybrid_verdict / len(cases):.1%}")
+    print(f"hybrid LLM calls      {borderline}/{len(cases)} (band {ATS_HYBRID_LOW}-{ATS_HYBRID_HIGH})")
+    for case, local, llm in zip(cases, local_scores, llm_scores):
+        title = case["resume"].get("title", "")[:40]
+        print(f"  {local:>3} local  {llm:>3} llm  {title}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,220 @@
+"""
+Microbenchmarks of the CPU-bound hot paths.
+
+Each case runs on synthetic resumes of several sizes (items per section):
+
+    prompts      load_prompt, build_resume_prompt, build_optimization_prompt
+    serializers  serialize_resume as used by pdf.py (dates) and optimization.py (ISO strings)
+    templates    Jinja rendering of every registered template
+    schemas      ResumeCreate / ResumeResponse validation
+    jwt          access token encode and decode
+
+Results are printed and can be saved as JSON. ``--compare`` loads a saved run and
+flags every case whose best time got slower than ``--threshold`` (the minimum is
+the least noisy statistic for microbenchmarks) by more than the combined stdev of
+both runs; a smaller slowdown is reported as noise. The exit status is 1 when there
+is a regression, so it can gate CI.
+
+    python -m benchmarks.hot_paths --output baseline.json
+    python -m benchmarks.hot_paths --compare baseline.json --threshold 0.1
+    python -m benchmarks.hot_paths -k templates --sizes 50
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Nothing here connects to the database, calls Gemini or signs real tokens, but the modules need the settings at import
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("LLM_BACKEND", "replay")
+
+from jose import jwt
+
+from LLM.generate_resume_prompt import build_resume_prompt
+from LLM.load_prompt import load_prompt
+from LLM.utils import get_prompt
+from models import Certification, Education, Experience, Project, Resume, Skill
+from optimization import build_optimization_prompt
+from resume_loader import serialize_resume
+from schemas import ResumeCreate, ResumeResponse
+from template_registry import template_registry
+from utils import ALGORITHM, SECRET_KEY, create_access_token
+
+SIZES = [1, 10, 50]
+WORDS = "designed built shipped scaled migrated python postgres fastapi services latency team customers".split()
+JOB_DESCRIPTION = " ".join(WORDS * 40)
+KEY_POINTS = {"skills": ["Python", "PostgreSQL", "FastAPI"], "expectations": ["Own backend services end to end"]}
+
+
+def text(words: int, seed: int) -> str:
+    return " ".join(WORDS[(seed + i) % len(WORDS)] for i in range(words))
+
+
+def make_resume(size: int) -> Resume:
+    """Transient Resume with ``size`` items in every section, as the loaders return it."""
+    start = date(2010, 1, 1)
+    resume = Resume(
+        id=uuid.uuid4(),
+        title="Senior backend engineer",
+        personal_info={
+            "full_name": "Jane Doe", "email": "jane@example.com", "phone": "+33 6 12 34 56 78",
+            "summary": text(60, 0), "linkedin": "https://linkedin.com/in/janedoe", "github": "https://github.com/janedoe",
+        },
+        created_at=datetime(2024, 1, 1),
+        updated_at=datetime(2024, 1, 2),
+    )
+    for i in range(size):
+        begin = start + timedelta(days=120 * i)
+        resume.experiences.append(Experience(
+            id=uuid.uuid4(), title=f"Engineer {i}", company=f"Company {i}", description=text(80, i),
+            start_date=begin, end_date=begin + timedelta(days=100),
+        ))
+        resume.educations.append(Education(
+            id=uuid.uuid4(), school=f"School {i}", degree="MSc", start_date=begin,
+            end_date=begin + timedelta(days=300), used_skills=WORDS[:5],
+        ))
+        resume.skills.append(Skill(id=uuid.uuid4(), skill_name=f"skill-{i}"))
+        resume.certifications.append(Certification(id=uuid.uuid4(), title=f"Cert {i}", authority="Authority", date=begin))
+        resume.projects.append(Project(
+            id=uuid.uuid4(), title=f"Project {i}", description=text(50, i), link=f"https://example.com/{i}", used_skills=WORDS[:3],
+        ))
+    return resume
+
+
+def cases(size: int):
+    """(group, name, callable) of every benchmark at one resume size."""
+    resume = make_resume(size)
+    for_pdf = serialize_resume(resume)
+    for_llm = serialize_resume(resume, iso_dates=True)
+    profile = {key: value for key, value in for_llm.items() if key != "title"}
+    response_dict = {
+        "id": resume.id, "created_at": resume.created_at, "updated_at": resume.updated_at,
+        **for_llm,
+        **{section: [{"id": uuid.uuid4(), **item} for item in for_llm[section]]
+           for section in ("experiences", "educations", "skills", "certifications", "projects")},
+    }
+    token = create_access_token({"sub": "jane@example.com"})
+    agents_prompts = get_prompt("agents.yaml")
+
+    yield "prompts", "load_prompt[eval_prompt]", lambda: load_prompt(agents_prompts, "eval_prompt", job_desc=JOB_DESCRIPTION, resume=for_llm)
+    yield "prompts", "build_resume_prompt", lambda: build_resume_prompt(profile, KEY_POINTS)
+    yield "prompts", "build_optimization_prompt", lambda: build_optimization_prompt(for_llm, JOB_DESCRIPTION, KEY_POINTS)
+    yield "serializers", "serialize_resume[pdf]", lambda: serialize_resume(resume)
+    yield "serializers", "serialize_resume[llm]", lambda: serialize_resume(resume, iso_dates=True)
+    for info in template_registry.list():
+        if info["valid"]:
+            template, _ = template_registry.get(info["template_id"])
+            yield "templates", f"render[{info['template_id']}]", lambda template=template: template.render(resume=for_pdf)
+    yield "schemas", "ResumeCreate.validate", lambda: ResumeCreate.model_validate(for_llm)
+    yield "schemas", "ResumeResponse.validate[orm]", lambda: ResumeResponse.model_validate(resume, from_attributes=True)
+    yield "schemas", "ResumeResponse.validate[dict]", lambda: ResumeResponse.model_validate(response_dict)
+    yield "schemas", "ResumeResponse.dump_json", lambda: ResumeResponse.model_validate(response_dict).model_dump_json()
+    if size == SIZES[0]:  # tokens don't depend on the resume
+        yield "jwt", "create_access_token", lambda: create_access_token({"sub": "jane@example.com"})
+        yield "jwt", "decode", lambda: jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+
+def measure(function, repeat: int, min_time: float) -> dict:
+    """Per-call seconds: calls per sample are scaled so each of ``repeat`` samples lasts ``min_time``."""
+    function()  # warm up caches (template bytecode, prompt registry, pydantic validators)
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 10:
+            break
+        number *= 10
+    number = max(1, int(number * min_time / elapsed))
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        samples.append((time.perf_counter() - start) / number)
+    return {
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "calls": number * repeat,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float, report_missing: bool = True) -> int:
+    regressions = 0
+    print(f"\n{'case':<50} {'baseline':>12} {'now':>12} {'change':>8}")
+    for key, result in results.items():
+        before = baseline.get(key)
+        if before is None:
+            print(f"{key:<50} {'-':>12} {result['min'] * 1e6:>10.1f}us {'new':>8}")
+            continue
+        change = result["min"] / before["min"] - 1
+        noise = math.hypot(result["stdev"], before["stdev"])
+        flag = ""
+        if change > threshold and result["min"] - before["min"] <= noise:
+            flag = "  noise"
+        elif change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{key:<50} {before['min'] * 1e6:>10.1f}us {result['min'] * 1e6:>10.1f}us {change:>+8.1%}{flag}")
+    if report_missing:
+        for key in sorted(baseline.keys() - results.keys()):
+            print(f"{key:<50} missing from this run")
+    print(f"\n{regressions} regression(s) above {threshold:.0%} and the combined stdev")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="items per resume section")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per case")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per sample")
+    parser.add_argument("-k", dest="filter", help="only cases whose group or name contains this")
+    parser.add_argument("--output", help="save the results as JSON")
+    parser.add_argument("--compare", help="JSON results of a previous run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="slowdown flagged as a regression")
+    args = parser.parse_args()
+
+    template_registry.warm()
+    results = {}
+    for size in args.sizes:
+        for group, name, function in cases(size):
+            key = f"{group}/{name}/size={size}"
+            if args.filter and args.filter not in key:
+                continue
+            results[key] = measure(function, args.repeat, args.min_time)
+            result = results[key]
+            print(f"{key:<50} {result['median'] * 1e6:>10.1f}us median  {result['min'] * 1e6:>10.1f}us min  ±{result['stdev'] * 1e6:.1f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {
+                    "created_at": datetime.utcnow().isoformat(),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "sizes": args.sizes,
+                },
+                "results": results,
+            }, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold, report_missing=not args.filter and args.sizes == SIZES)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Throughput of a running API at increasing concurrency.
+
+Logs in once, then keeps ``--concurrency`` clients calling the endpoint of the
+scenario for ``--duration`` seconds at each level:
+
+    read      GET /resume/{id}
+    optimize  POST /optimize-resume
+    generate  POST /generate-resume (the LangGraph loop)
+
+With the async database path read throughput should keep climbing with
+concurrency until the database (or the connection pool) saturates, instead of
+flattening out at the size of the threadpool.
+
+    uvicorn main:app --port 8000 &
+    python -m benchmarks.load_test --email me@example.com --password secret --resume-id <uuid>
+
+The LLM scenarios run without network against a cassette recorded once:
+
+    LLM_BACKEND=record uvicorn main:app --port 8000    # exercise the endpoints once
+    LLM_BACKEND=replay LLM_REPLAY_LATENCY=recorded LLM_CACHE_ENABLED=false uvicorn main:app --port 8000 &
+    python -m benchmarks.load_test ... --scenario generate --job-description job.txt --levels 1 4 16
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+LEVELS = [1, 2, 4, 8, 16, 32, 64]
+
+
+async def login(client, email, password):
+    response = await client.post("/login", data={"username": email, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def run_level(client, call, concurrency, duration):
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await call()
+            if response.status_code != 200:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)] if latencies else 0.0
+    p50 = statistics.median(latencies) if latencies else 0.0
+    print(
+        f"concurrency {concurrency:>3}   {len(latencies) / elapsed:8.1f} req/s   "
+        f"p50 {p50 * 1000:7.1f} ms   p99 {p99 * 1000:7.1f} ms   errors {errors}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--resume-id", required=True)
+    parser.add_argument("--scenario", choices=["read", "optimize", "generate"], default="read")
+    parser.add_argument("--job-description", help="file with the job description of the LLM scenarios")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per concurrency level")
+    parser.add_argument("--levels", type=int, nargs="+", default=LEVELS)
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=max(args.levels), max_keepalive_connections=max(args.levels))
+    job_description = "Backend developer, Python and PostgreSQL."
+    if args.job_description:
+        with open(args.job_description, encoding="utf-8") as f:
+            job_description = f.read()
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=300) as client:
+        token = await login(client, args.email, args.password)
+        client.headers["Authorization"] = f"Bearer {token}"
+        calls = {
+            "read": lambda: client.get(f"/resume/{args.resume_id}"),
+            "optimize": lambda: client.post("/optimize-resume", json={"resume_id": args.resume_id, "job_description": job_description}),
+            "generate": lambda: client.post("/generate-resume", json={"job_description": job_description}),
+        }
+        call = calls[args.scenario]
+        await call()  # warm up connections and the auth cache outside the measurement
+        for concurrency in args.levels:
+            await run_level(client, call, concurrency, args.duration)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+"""
+Login throughput before/after moving bcrypt off the request threadpool.
+
+Simulates a burst of concurrent logins, each verifying a bcrypt hash, while a
+probe keeps calling a trivial sync "endpoint" through the same threadpool that
+FastAPI uses. Reports logins/s and the probe's latency, which is what the rest
+of the API experiences during the burst.
+
+    python -m benchmarks.login_throughput --logins 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import anyio.to_thread
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from password_hashing import PasswordHasher, get_password_hash, verify_password
+
+PASSWORD = "correct horse battery staple"
+
+
+async def inline_verify(plain_password, hashed_password):
+    # Before: bcrypt inside a sync endpoint, i.e. on the shared threadpool
+    return await anyio.to_thread.run_sync(verify_password, plain_password, hashed_password)
+
+
+async def probe(latencies, stop):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await anyio.to_thread.run_sync(lambda: None)
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.01)
+
+
+async def run(mode, verify, hashed, logins, concurrency):
+    gate = asyncio.Semaphore(concurrency)
+    latencies, stop = [], asyncio.Event()
+
+    async def one_login():
+        async with gate:
+            assert await verify(PASSWORD, hashed)
+
+    probe_task = asyncio.create_task(probe(latencies, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(one_login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0.0
+    print(
+        f"{mode:<8} {logins / elapsed:8.1f} logins/s   "
+        f"probe p50 {statistics.median(latencies) * 1000:7.1f} ms   p99 {p99 * 1000:7.1f} ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    hashed = get_password_hash(PASSWORD)
+    hasher = PasswordHasher(workers=args.workers, max_pending=args.logins)
+    await hasher.verify(PASSWORD, hashed)  # start the worker processes outside the measurement
+
+    await run("inline", inline_verify, hashed, args.logins, args.concurrency)
+    await run("pool", hasher.verify, hashed, args.logins, args.concurrency)
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
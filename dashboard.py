@@ -1,22 +1,130 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from database import get_db
-from models import Resume, Application, User
-from schemas import ApplicationCreate, ApplicationResponse, ResumeResponse
+import base64
+import json
+import uuid
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
+from models import Resume, Application
+from schemas import ApplicationCreate, ApplicationResponse, ApplicationPage, DashboardResponse, DashboardSummary, ResumePage
 from utils import get_current_user
+from user_cache import CurrentUser
+from query_budget import query_budget
 
 router = APIRouter()
 
-@router.get("/dashboard")
-def get_dashboard(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    resumes = db.query(Resume).filter(Resume.user_id == user.id).all()
-    applications = db.query(Application).filter(Application.user_id == user.id).all()
-    return {"resumes": resumes, "applications": applications}
+def encode_cursor(sort_value, row_id: uuid.UUID) -> str:
+    """Opaque keyset cursor: the sort key and id of the last row of a page."""
+    payload = json.dumps([sort_value.isoformat(), str(row_id)])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str, parse):
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return parse(sort_value), uuid.UUID(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def after_cursor(sort_column, id_column, sort_value, row_id):
+    # Rows strictly after (sort_value, row_id) in (sort_column DESC, id DESC) order
+    return or_(sort_column < sort_value, and_(sort_column == sort_value, id_column < row_id))
+
+async def list_resumes(db: AsyncSession, user: CurrentUser, limit: int, cursor: Optional[str] = None,
+                 date_from: Optional[date] = None, date_to: Optional[date] = None) -> dict:
+    # Only the columns a listing needs; personal_info and the sections stay in the database
+    query = select(Resume.id, Resume.title, Resume.created_at, Resume.updated_at).where(Resume.user_id == user.id)
+    if date_from:
+        query = query.where(Resume.created_at >= datetime.combine(date_from, time.min))
+    if date_to:
+        query = query.where(Resume.created_at < datetime.combine(date_to + timedelta(days=1), time.min))
+    if cursor:
+        created_at, resume_id = decode_cursor(cursor, datetime.fromisoformat)
+        query = query.where(after_cursor(Resume.created_at, Resume.id, created_at, resume_id))
+    rows = (await db.execute(query.order_by(Resume.created_at.desc(), Resume.id.desc()).limit(limit + 1))).all()
+    next_cursor = encode_cursor(rows[limit - 1].created_at, rows[limit - 1].id) if len(rows) > limit else None
+    return {"items": rows[:limit], "next_cursor": next_cursor}
+
+async def list_applications(db: AsyncSession, user: CurrentUser, limit: int, cursor: Optional[str] = None, status: Optional[str] = None,
+                      date_from: Optional[date] = None, date_to: Optional[date] = None) -> dict:
+    query = select(Application).where(Application.user_id == user.id)
+    if status:
+        query = query.where(Application.status == status)
+    if date_from:
+        query = query.where(Application.application_date >= date_from)
+    if date_to:
+        query = query.where(Application.application_date <= date_to)
+    if cursor:
+        application_date, application_id = decode_cursor(cursor, date.fromisoformat)
+        query = query.where(after_cursor(Application.application_date, Application.id, application_date, application_id))
+    query = query.order_by(Application.application_date.desc(), Application.id.desc()).limit(limit + 1)
+    rows = (await db.execute(query)).scalars().all()
+    next_cursor = encode_cursor(rows[limit - 1].application_date, rows[limit - 1].id) if len(rows) > limit else None
+    return {"items": rows[:limit], "next_cursor": next_cursor}
+
+async def dashboard_summary(db: AsyncSession, user: CurrentUser) -> dict:
+    """Counts per application status and latest activity, aggregated by the database."""
+    status_rows = (await db.execute(
+        select(Application.status, func.count(Application.id), func.max(Application.application_date))
+        .where(Application.user_id == user.id)
+        .group_by(Application.status)
+    )).all()
+    resume_count, last_resume_update = (await db.execute(
+        select(func.count(Resume.id), func.max(Resume.updated_at)).where(Resume.user_id == user.id)
+    )).one()
+    dates = [latest for _, _, latest in status_rows if latest]
+    return {
+        "resume_count": resume_count,
+        "application_count": sum(count for _, count, _ in status_rows),
+        "applications_by_status": [
+            {"status": status, "count": count, "latest_application_date": latest}
+            for status, count, latest in status_rows
+        ],
+        "last_resume_update": last_resume_update,
+        "last_application_date": max(dates) if dates else None,
+    }
+
+@router.get("/dashboard", response_model=DashboardResponse, dependencies=[Depends(query_budget(5))])
+async def get_dashboard(limit: int = Query(10, ge=1, le=100), db: AsyncSession = Depends(get_async_db), user: CurrentUser = Depends(get_current_user)):
+    """Summary plus the first page of resumes and applications; follow next_cursor on the list endpoints."""
+    return {
+        "summary": await dashboard_summary(db, user),
+        "resumes": await list_resumes(db, user, limit),
+        "applications": await list_applications(db, user, limit),
+    }
+
+@router.get("/dashboard/summary", response_model=DashboardSummary, dependencies=[Depends(query_budget(3))])
+async def get_dashboard_summary(db: AsyncSession = Depends(get_async_db), user: CurrentUser = Depends(get_current_user)):
+    return await dashboard_summary(db, user)
+
+@router.get("/dashboard/resumes", response_model=ResumePage, dependencies=[Depends(query_budget(2))])
+async def get_dashboard_resumes(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db),
+    user: CurrentUser = Depends(get_current_user)
+):
+    return await list_resumes(db, user, limit, cursor=cursor, date_from=date_from, date_to=date_to)
+
+@router.get("/dashboard/applications", response_model=ApplicationPage, dependencies=[Depends(query_budget(2))])
+async def get_dashboard_applications(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db),
+    user: CurrentUser = Depends(get_current_user)
+):
+    return await list_applications(db, user, limit, cursor=cursor, status=status, date_from=date_from, date_to=date_to)
 
 @router.post("/application", response_model=ApplicationResponse)
-def create_application(app: ApplicationCreate, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+async def create_application(app: ApplicationCreate, db: AsyncSession = Depends(get_async_db), user: CurrentUser = Depends(get_current_user)):
     db_app = Application(user_id=user.id, **app.dict())
     db.add(db_app)
-    db.commit()
-    db.refresh(db_app)
-    return db_app
\ No newline at end of file
+    await db.commit()
+    await db.refresh(db_app)
+    return db_app
@@ -1,12 +1,40 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from db_pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument, pool_options
+from metrics import instrument_sql
 from dotenv import load_dotenv
 load_dotenv() 
 import os
 DATABASE_URL = os.getenv("DATABASE_URL")  # Update with your credentials
-engine = create_engine(DATABASE_URL)
+
+# Async drivers for the sync URLs we support
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+def to_async_url(url: str) -> str:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}; set ASYNC_DATABASE_URL")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+# Sync engine: scripts, create_all and the routers that still run in the threadpool
+engine = create_engine(DATABASE_URL, **pool_options(InstrumentedQueuePool))
+instrument(engine, "sync")
+instrument_sql(engine, "sync")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine: the CRUD routers. expire_on_commit=False because attributes can't be
+# lazily refreshed outside of an await.
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **pool_options(InstrumentedAsyncQueuePool))
+instrument(async_engine.sync_engine, "async")
+instrument_sql(async_engine.sync_engine, "async")
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -14,4 +42,8 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
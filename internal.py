@@ -0,0 +1,47 @@
+from fastapi import APIRouter
+from render_pool import render_pool
+from pdf_cache import pdf_cache
+from user_cache import user_cache
+from db_pool import pool_stats
+from LLM.cache import llm_cache
+from LLM.cassette import cassette
+from LLM.client import llm_client
+from jobs import generation_jobs
+
+router = APIRouter(prefix="/internal", tags=["Internal"])
+
+@router.get("/pdf-pool")
+def get_pdf_pool_stats():
+    """Queue wait vs render time of the PDF render pool, used to size PDF_RENDER_WORKERS."""
+    return render_pool.stats()
+
+@router.get("/pdf-cache")
+def get_pdf_cache_stats():
+    return pdf_cache.stats()
+
+@router.get("/auth-cache")
+def get_auth_cache_stats():
+    return user_cache.stats()
+
+@router.get("/db-pool")
+def get_db_pool_stats():
+    """Checkouts, checkout wait and overflow of the sync and async connection pools."""
+    return pool_stats()
+
+@router.get("/llm-cache")
+def get_llm_cache_stats():
+    return llm_cache.stats()
+
+@router.get("/llm-client")
+def get_llm_client_stats():
+    """Upstream Gemini calls, calls served by an identical in-flight request, current concurrency, retries, hedging, circuit breaker and tokens per prompt."""
+    return llm_client.stats()
+
+@router.get("/llm-cassette")
+def get_llm_cassette_stats():
+    """LLM backend (live, record or replay) and how many responses were recorded or replayed."""
+    return cassette.stats()
+
+@router.get("/generation-jobs")
+def get_generation_job_stats():
+    return generation_jobs.stats()
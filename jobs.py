@@ -0,0 +1,155 @@
+import asyncio
+import contextvars
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, List, Optional
+
+from dotenv import load_dotenv
+load_dotenv()
+
+GENERATION_JOB_WORKERS = int(os.getenv("GENERATION_JOB_WORKERS", "4"))
+GENERATION_JOB_MAX_PENDING = int(os.getenv("GENERATION_JOB_MAX_PENDING", "64"))
+GENERATION_JOB_TTL = int(os.getenv("GENERATION_JOB_TTL", "3600"))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are queued or running."""
+
+
+@dataclass
+class JobEvent:
+    event: str  # "status", "progress", "result" or "error"
+    data: Any
+
+
+@dataclass
+class Job:
+    id: uuid.UUID
+    user_id: uuid.UUID
+    status: str = QUEUED
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    updated_at: datetime = field(default_factory=datetime.utcnow)
+    events: List[JobEvent] = field(default_factory=list)
+    result: Any = None
+    error: Optional[str] = None
+    finished_at: Optional[float] = None  # monotonic, for expiry
+    _changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def emit(self, event: str, data):
+        self.events.append(JobEvent(event, data))
+        self.updated_at = datetime.utcnow()
+        # Wake every subscriber, then give the next ones a fresh event to wait on
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def _set_status(self, status: str):
+        self.status = status
+        self.emit("status", {"status": status})
+
+    async def subscribe(self):
+        """Every event of the job so far, then the new ones until it finishes."""
+        index = 0
+        while True:
+            changed = self._changed
+            while index < len(self.events):
+                yield self.events[index]
+                index += 1
+            if self.done:
+                return
+            await changed.wait()
+
+
+class JobManager:
+    """
+    In-process background jobs bounded by a fixed number of workers.
+
+    Submitting returns immediately; the job waits for one of ``workers`` slots and
+    then runs on the event loop. Jobs live in memory of the worker that accepted
+    them and are dropped ``ttl`` seconds after they finish, so status requests must
+    reach the same process (sticky sessions when running several uvicorn workers).
+    """
+
+    def __init__(self, workers: int, max_pending: int, ttl: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._jobs = {}
+        self._tasks = set()
+        self._slots = None
+
+    def _purge(self):
+        now = time.monotonic()
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.done and now - job.finished_at > self.ttl]:
+            del self._jobs[job_id]
+
+    def submit(self, user_id: uuid.UUID, run: Callable[[Job], Awaitable[Any]]) -> Job:
+        """Queue ``run(job)``; its return value becomes the job result."""
+        self._purge()
+        if len(self._tasks) >= self.max_pending:
+            raise JobQueueFull("Too many generation jobs in progress")
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        job = Job(id=uuid.uuid4(), user_id=user_id)
+        job.emit("status", {"status": QUEUED})
+        self._jobs[job.id] = job
+        # A fresh context so the job doesn't inherit request-scoped state (query budget counter)
+        task = asyncio.get_running_loop().create_task(self._run(job, run), context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job: Job, run):
+        async with self._slots:
+            job._set_status(RUNNING)
+            try:
+                job.result = await run(job)
+            except asyncio.CancelledError:
+                job.error = "Job was cancelled"
+                job.emit("error", {"detail": job.error})
+                job._set_status(FAILED)
+                raise
+            except Exception as e:
+                job.error = getattr(e, "detail", None) or str(e)
+                job.emit("error", {"detail": job.error})
+                job._set_status(FAILED)
+            else:
+                job.emit("result", job.result)
+                job._set_status(SUCCEEDED)
+            finally:
+                job.finished_at = time.monotonic()
+
+    def get(self, job_id: uuid.UUID, user_id: uuid.UUID) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is None or job.user_id != user_id:
+            return None
+        return job
+
+    def stats(self) -> dict:
+        statuses = [job.status for job in self._jobs.values()]
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "jobs": len(statuses),
+            **{status: statuses.count(status) for status in (QUEUED, RUNNING, SUCCEEDED, FAILED)},
+        }
+
+    async def shutdown(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+generation_jobs = JobManager(
+    workers=GENERATION_JOB_WORKERS,
+    max_pending=GENERATION_JOB_MAX_PENDING,
+    ttl=GENERATION_JOB_TTL,
+)
@@ -1,16 +1,38 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from auth import router as auth_router
 from resumes import router as resumes_router
 from optimization import router as optimization_router
 from pdf import router as pdf_router
 from dashboard import router as dashboard_router
-from database import Base,engine
+from database import Base,engine,async_engine
 from userInfo import router as userInfo_router
+from internal import router as internal_router
+from render_pool import render_pool
+from template_registry import template_registry
+from LLM.prompt_registry import prompt_registry
+from LLM.cassette import LLM_BACKEND, cassette
+from password_hashing import password_hasher
+from jobs import generation_jobs
+from metrics import MetricsMiddleware, router as metrics_router, track_in_flight
 
 
 Base.metadata.create_all(bind=engine)  # Add this to a script or main.py
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    template_registry.warm()
+    prompt_registry.warm()
+    if LLM_BACKEND == "replay":
+        cassette.load()
+    yield
+    render_pool.shutdown()
+    password_hasher.shutdown()
+    await generation_jobs.shutdown()
+    await async_engine.dispose()
+
+app = FastAPI(lifespan=lifespan, dependencies=[Depends(track_in_flight)])
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],
@@ -18,6 +40,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 @app.get("/")
 def read_root():
@@ -28,4 +51,6 @@ app.include_router(resumes_router)
 app.include_router(optimization_router)
 app.include_router(pdf_router)
 app.include_router(dashboard_router)
-app.include_router(userInfo_router)
\ No newline at end of file
+app.include_router(userInfo_router)
+app.include_router(internal_router)
+app.include_router(metrics_router)
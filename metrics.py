@@ -0,0 +1,272 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Tuple
+
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import event
+
+from query_budget import count_query
+
+# Latency buckets in seconds, from a cached SELECT up to a full resume generation
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Scope of the request being handled (None for jobs) and graph node running, so SQL
+# and LLM samples can be attributed to them
+_scope = ContextVar("metrics_scope", default=None)
+_node = ContextVar("metrics_graph_node", default="none")
+
+_INF = 'le="+Inf"'
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def _samples(self):
+        with self._lock:
+            return [(f"{self.name}{_format_labels(self.labels, key)}", value) for key, value in self._values.items()]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{name} {value:g}" for name, value in self._samples()]
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["buckets"][index] += 1
+                    break
+            entry["sum"] += value
+            entry["count"] += 1
+
+    def _samples(self):
+        with self._lock:
+            values = {key: {**entry, "buckets": list(entry["buckets"])} for key, entry in self._values.items()}
+        bounds = ['le="%g"' % bound for bound in self.buckets]
+        samples = []
+        for key, entry in values.items():
+            cumulative = 0
+            for bound, count in zip(bounds, entry["buckets"]):
+                cumulative += count
+                samples.append((f"{self.name}_bucket{_format_labels(self.labels, key, bound)}", cumulative))
+            samples.append((f"{self.name}_bucket{_format_labels(self.labels, key, _INF)}", entry["count"]))
+            samples.append((f"{self.name}_sum{_format_labels(self.labels, key)}", entry["sum"]))
+            samples.append((f"{self.name}_count{_format_labels(self.labels, key)}", entry["count"]))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def add(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format (0.0.4)."""
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.add(Counter(
+    "http_requests_total", "HTTP requests by route template, method and status.", ("route", "method", "status")))
+http_request_duration = registry.add(Histogram(
+    "http_request_duration_seconds", "Time from request start to the end of the response body.", ("route", "method")))
+http_requests_in_flight = registry.add(Gauge(
+    "http_requests_in_flight", "Requests being handled, by route template and method.", ("route", "method")))
+
+sql_queries = registry.add(Counter(
+    "sql_queries_total", "SQL statements executed, by engine, statement type and route.", ("engine", "statement", "route")))
+sql_query_duration = registry.add(Histogram(
+    "sql_query_duration_seconds", "SQL statement execution time.", ("engine", "statement", "route")))
+
+llm_calls = registry.add(Counter(
+    "llm_calls_total", "LLM generations by graph node, prompt and source (upstream, cache, coalesced, error).",
+    ("node", "prompt", "source")))
+llm_call_duration = registry.add(Histogram(
+    "llm_call_duration_seconds", "Upstream LLM call time, retries and hedging included.", ("node", "prompt")))
+llm_tokens = registry.add(Counter(
+    "llm_tokens_total", "Tokens reported by Gemini, by graph node, prompt and direction.", ("node", "prompt", "direction")))
+graph_node_duration = registry.add(Histogram(
+    "graph_node_duration_seconds", "Time spent in each node of the resume graph.", ("node",)))
+
+pdf_renders = registry.add(Counter(
+    "pdf_renders_total", "PDF render jobs by outcome (rendered, failed, rejected, timed_out).", ("outcome",)))
+pdf_renders_in_flight = registry.add(Gauge(
+    "pdf_renders_in_flight", "PDF render jobs queued or rendering."))
+pdf_queue_wait = registry.add(Histogram(
+    "pdf_render_queue_wait_seconds", "Time a PDF job waited for a render worker."))
+pdf_render_duration = registry.add(Histogram(
+    "pdf_render_duration_seconds", "Time spent in wkhtmltopdf."))
+
+
+def route_label(scope) -> str:
+    """Template of the route the router matched (``/resume/{resume_id}``), ``unmatched`` before or without a match."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def current_route() -> str:
+    scope = _scope.get()
+    return "background" if scope is None else route_label(scope)
+
+
+def current_node() -> str:
+    return _node.get()
+
+
+@contextmanager
+def graph_node(name: str):
+    """``with graph_node("evaluate_resume"):`` attributes the LLM calls inside to the node and times it."""
+    token = _node.set(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        graph_node_duration.observe(time.perf_counter() - start, node=name)
+        _node.reset(token)
+
+
+def _statement_type(statement: str) -> str:
+    words = statement.lstrip().split(None, 1)
+    verb = words[0].upper() if words else ""
+    return verb if verb in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+
+
+def instrument_sql(engine, name: str):
+    """
+    Count and time the statements of a (sync) engine; for an async engine pass
+    ``engine.sync_engine``. The same listener counts them for query budgets.
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        count_query(statement)
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["metrics_query_start"].pop()
+        labels = {"engine": name, "statement": _statement_type(statement), "route": current_route()}
+        sql_queries.inc(**labels)
+        sql_query_duration.observe(time.perf_counter() - started, **labels)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        starts = context.connection.info.get("metrics_query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency and status per route. Routes are labelled
+    by their template (``/resume/{resume_id}``) so the number of series stays
+    bounded; paths that match no route are ``unmatched``. The router stores the
+    matched route in the scope only after this middleware is entered, so requests
+    in flight are counted by ``track_in_flight`` instead.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        token = _scope.set(scope)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = route_label(scope)
+            http_request_duration.observe(time.perf_counter() - start, route=route, method=method)
+            http_requests.inc(route=route, method=method, status=status["code"])
+            _scope.reset(token)
+
+
+async def track_in_flight(request: Request):
+    """
+    App-wide dependency counting the request in ``http_requests_in_flight`` under
+    the route it matched, until its response has been sent.
+    """
+    labels = {"route": route_label(request.scope), "method": request.method}
+    http_requests_in_flight.inc(**labels)
+    try:
+        yield
+    finally:
+        http_requests_in_flight.dec(**labels)
+
+
+router = APIRouter(tags=["Internal"])
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, Date
+from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, Date, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -84,6 +84,7 @@ class UserProject(Base):
 # Updated Resume model
 class Resume(Base):
     __tablename__ = "resumes"
+    __table_args__ = (Index("ix_resumes_user_created", "user_id", "created_at", "id"),)
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), index=True)
     title = Column(String, nullable=False)  # Added for clarity
@@ -146,6 +147,7 @@ class Project(Base):
 
 class Application(Base):
     __tablename__ = "applications"
+    __table_args__ = (Index("ix_applications_user_date", "user_id", "application_date", "id"),)
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
     resume_id = Column(UUID(as_uuid=True), ForeignKey("resumes.id"), nullable=True)
@@ -154,4 +156,11 @@ class Application(Base):
     application_date = Column(Date)
     status = Column(String)
     user = relationship("User", back_populates="applications")
-    resume = relationship("Resume")
\ No newline at end of file
+    resume = relationship("Resume")
+# Skills/expectations extracted from a job description, shared by every user who pastes the same posting
+class JobDescriptionAnalysis(Base):
+    __tablename__ = "job_description_analyses"
+    fingerprint = Column(String(64), primary_key=True)  # sha256 of the case- and whitespace-folded text
+    key_points = Column(JSON)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
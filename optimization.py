@@ -1,237 +1,206 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from database import get_db
-from models import Resume, User, UserProfile
-from schemas import GenerateResumeRequest, OptimizeRequest, ResumeCreate
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
+from schemas import GenerateResumeRequest, GenerationJobResponse, OptimizeRequest, ResumeCreate
 from utils import get_current_user
+from user_cache import CurrentUser
+from resume_loader import load_resume_async, load_profile_async, serialize_resume, serialize_sections
+from query_budget import query_budget
 import json
-import re
+import uuid
 from pydantic import BaseModel
-import requests
-import os
-from dotenv import load_dotenv
-load_dotenv() 
-from LLM.agents import resume_graph
+from LLM.agents import extract_key_points, resume_graph
+from LLM.client import llm_client
+from LLM.prompt_registry import prompt_registry, resume_schema_json
+from LLM.resilience import deadline_share, llm_deadline
+from jobs import Job, JobQueueFull, generation_jobs
+from sse import SSE_HEADERS, sse_event
 
-import google.generativeai as genai
 router = APIRouter()
 
-# Hugging Face model configuration
-
-GEMINI_API_TOKEN = os.getenv("GEMINI_API_TOKEN")
-if not GEMINI_API_TOKEN:
-    raise ValueError("GEMINI_API_TOKEN environment variable not set")
-genai.configure(api_key=GEMINI_API_TOKEN)
-
 class OptimizedResumeResponse(BaseModel):
     optimized_resume: ResumeCreate
 class GeneratedResumeResponse(BaseModel):
     generated_resume: ResumeCreate
-def query_to_llm(prompt: str) -> str:
-    """Helper function to query the Gemini API for chat completions."""
-    model = genai.GenerativeModel('gemini-2.0-flash-exp')  # Or 'gemini-pro-vision' for multimodal
-
-    try:
-        response = model.generate_content(prompt)
-        
-
-        # The text output is directly accessible
-        generated_text = response.text.strip()
-        print(generated_text)
-        return generated_text
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Gemini API call failed: {str(e)}")
       
-@router.post("/optimize-resume", response_model=OptimizedResumeResponse)
-def optimize_resume(request: OptimizeRequest, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    resume = db.query(Resume).filter(Resume.id == request.resume_id, Resume.user_id == user.id).first()
-    if not resume:
-        raise HTTPException(status_code=404, detail="Resume not found")
-
-    # Serialize resume data
-    resume_data = {
-        "personal_info": resume.personal_info or {},
-        "experiences": [
-            {
-                "title": e.title,
-                "company": e.company,
-                "description": e.description,
-                "start_date": e.start_date.isoformat(),
-                "end_date": e.end_date.isoformat() if e.end_date else None
-            }
-            for e in resume.experiences
-        ],
-        "educations": [
-            {
-                "school": edu.school,
-                "degree": edu.degree,
-                "start_date": edu.start_date.isoformat(),
-                "end_date": edu.end_date.isoformat() if edu.end_date else None
-            }
-            for edu in resume.educations
-        ],
-        "skills": [
-            {"skill_name": s.skill_name}
-            for s in resume.skills
-        ],
-        "certifications": [
-            {
-                "title": cert.title,
-                "authority": cert.authority,
-                "date": cert.date.isoformat()
-            }
-            for cert in resume.certifications
-        ],
-        "projects": [
-            {
-                "title": proj.title,
-                "description": proj.description,
-                "link": proj.link,
-                "used_skills": proj.used_skills,
-            }
-            for proj in resume.projects
-        ]
-    }
-    job_description = request.job_description
-    print(json.dumps(resume_data, indent=2))
-    # Construct the prompt for the Hugging Face model.
-    optimization_prompt = (
-    "You are an HR professional reviewing a candidate's resume against a specific job description. "
-    "Your goal is to enhance the candidate's skills, education, experiences, certifications, and projects so that they better meet "
-    "the job requirements, while strictly preserving the candidate’s original personal information "
-    "(full_name, email, phone, address, linkedin, facebook, and x) and all the original resume content. Do not create new personal data, "
-    "modify existing personal details, or add any extra fields not present in the candidate’s original resume.\n\n"
-    
-    f"Original Resume Data:\n{json.dumps(resume_data, indent=2)}\n\n"
-    f"Job Description:\n{job_description}\n\n"
-    
-    "Using only the information available in the original resume data, optimize the wording, ordering, and emphasis "
-    "of the skills, education, experiences, certifications, and projects to better align with the job description. "
-    "Ensure that you do not introduce any new skills, used_skills, or any other data that were not originally present. "
-    "Only rephrase, reorder, or clarify the existing information.\n\n"
-    
-    "In addition, please follow standard resume norms:\n"
-    "- List work experiences and education in reverse chronological order (newest first).\n"
-    "- Use concise, action-oriented language and ensure consistency throughout the resume.\n"
-    "- Ensure date values are in the 'YYYY-MM-DD' format and accurately reflect the timeline (most recent experiences and educations come first).\n"
-    "- Maintain clarity and proper formatting of sections to make the resume easy to read.\n\n"
-    "- If the skills, certification, description of the job experiences are irrelevant to the job application, rewrite if possible Or if it does not concern the job, don't include it in the result.\n\n"
-    
-    "For every optional field (such as address, linkedin, facebook, x, end_date, link), if it is missing in the original resume data, "
-    "set its value explicitly to null in the optimized JSON.\n\n"
-    
-    "Return the optimized resume strictly in JSON format matching the following ResumeCreate schema. Do not include any additional text, explanations, or formatting.\n\n"
-    
-    f"The required ouput JSON schema is: {ResumeCreate.model_json_schema()}\n"
-    
-    "Ensure that:\n"
-    "- All dates are formatted as 'YYYY-MM-DD'.\n"
-    "- Work experiences and education entries are sorted in reverse chronological order (newest first).\n"
-    "- No new personal or resume content is generated or altered; only the wording, order, and emphasis are improved.\n"
-    "- All fields correspond directly to entries from the original resume data.\n"
-    "- Optional fields missing from the original data are explicitly set to null.\n"
-    "- The final result is valid JSON matching the provided schema.\n\n"
-    
-    "Output only the JSON and nothing else."
-)
-
-
-
-
-
-    # Query the Hugging Face model for the optimized resume.
-    optimized_resume_str = query_to_llm(optimization_prompt)
-
+def build_optimization_prompt(resume_data: dict, job_description: str, key_points: dict) -> str:
+    return prompt_registry.render(
+        "optimize.yaml",
+        "prompt",
+        resume_data=resume_data,
+        job_description=job_description,
+        key_points=key_points,
+        schema=resume_schema_json(),
+    )
+
+def parse_optimized_resume(optimized_resume_str: str) -> ResumeCreate:
     # Parse the generated response as JSON.
     try:
         # Remove any markdown formatting if present.
         optimized_resume_str = optimized_resume_str.replace("```json", "").replace("```", "")
-        print(f"------------------{optimized_resume_str}-------------")
         optimized_resume_json = json.loads(optimized_resume_str)
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Failed to parse optimized resume JSON")
 
     # Validate the JSON data against the ResumeCreate schema.
     try:
-        optimized_resume = ResumeCreate(**optimized_resume_json)
+        return ResumeCreate(**optimized_resume_json)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Invalid optimized resume data: {str(e)}")
 
-    return OptimizedResumeResponse(optimized_resume=optimized_resume)
-
-@router.post("/generate-resume", response_model=GeneratedResumeResponse)
-def generate_resume(request: GenerateResumeRequest, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    # Retrieve the user's profile from the database
-    profile = db.query(UserProfile).filter(UserProfile.user_id == user.id).first()
-    if not profile:
-        raise HTTPException(status_code=404, detail="User profile not found")
+@router.post("/optimize-resume", response_model=OptimizedResumeResponse, dependencies=[Depends(query_budget(9))])
+async def optimize_resume(request: OptimizeRequest, db: AsyncSession = Depends(get_async_db), user: CurrentUser = Depends(get_current_user)):
+    resume = await load_resume_async(db, request.resume_id, user.id)
+    if not resume:
+        raise HTTPException(status_code=404, detail="Resume not found")
 
-    # Serialize the user's profile data
-    profile_data = {
-        "personal_info": profile.personal_info or {},
-        "experiences": [
-            {
-                "title": e.title,
-                "company": e.company,
-                "description": e.description,
-                "start_date": e.start_date.isoformat(),
-                "end_date": e.end_date.isoformat() if e.end_date else None
-            }
-            for e in profile.experiences
-        ],
-        "educations": [
-            {
-                "school": edu.school,
-                "degree": edu.degree,
-                "start_date": edu.start_date.isoformat(),
-                "end_date": edu.end_date.isoformat() if edu.end_date else None,
-                "used_skills": edu.used_skills,
-            }
-            for edu in profile.educations
-        ],
-        "skills": [
-            {"skill_name": s.skill_name}
-            for s in profile.skills
-        ],
-        "certifications": [
-            {
-                "title": cert.title,
-                "authority": cert.authority,
-                "date": cert.date.isoformat()
-            }
-            for cert in profile.certifications
-        ],
-        "projects": [
-            {
-                "title": proj.title,
-                "description": proj.description,
-                "link": proj.link,
-                "used_skills": proj.used_skills,
-            }
-            for proj in profile.projects
-        ]
-    }
+    # Serialize resume data
+    resume_data = serialize_resume(resume, iso_dates=True)
     job_description = request.job_description
+    with llm_deadline():
+        # Key points, then the optimization itself
+        with deadline_share(2):
+            key_points = await extract_key_points(job_description, use_cache=not request.no_cache)
+        optimization_prompt = build_optimization_prompt(resume_data, job_description, key_points)
 
-    # Construct the prompt for the LLM
+        # Query the Hugging Face model for the optimized resume.
+        optimized_resume = await llm_client.generate(
+            optimization_prompt, use_cache=not request.no_cache, label="optimize.yaml:prompt", parse=parse_optimized_resume,
+        )
 
-    initial_state = {
-    "profile_data": profile_data,
-    "job_description": job_description,
+    return OptimizedResumeResponse(optimized_resume=optimized_resume)
+
+@router.post("/optimize-resume/stream", dependencies=[Depends(query_budget(9))])
+async def optimize_resume_stream(request: OptimizeRequest, db: AsyncSession = Depends(get_async_db), user: CurrentUser = Depends(get_current_user)):
+    """
+    Streaming /optimize-resume. Server-sent events: ``start`` right away, ``delta``
+    events carrying the model output as it is generated, then ``result`` with the
+    validated optimized resume or ``error``.
+    """
+    resume = await load_resume_async(db, request.resume_id, user.id)
+    if not resume:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    resume_data = serialize_resume(resume, iso_dates=True)
+
+    async def events():
+        yield sse_event("start", {"resume_id": request.resume_id})
+        try:
+            with llm_deadline():
+                with deadline_share(2):
+                    key_points = await extract_key_points(request.job_description, use_cache=not request.no_cache)
+                optimization_prompt = build_optimization_prompt(resume_data, request.job_description, key_points)
+                chunks = []
+                stream = llm_client.stream(
+                    optimization_prompt, use_cache=not request.no_cache, label="optimize.yaml:prompt", validate=parse_optimized_resume,
+                )
+                async for chunk in stream:
+                    chunks.append(chunk)
+                    yield sse_event("delta", {"text": chunk})
+            optimized_resume = parse_optimized_resume("".join(chunks))
+        except Exception as e:
+            yield sse_event("error", {"detail": getattr(e, "detail", None) or str(e)})
+            return
+        yield sse_event("result", OptimizedResumeResponse(optimized_resume=optimized_resume).model_dump(mode="json"))
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+def generation_state(profile, request: GenerateResumeRequest) -> dict:
+    return {
+    "profile_data": serialize_sections(profile, iso_dates=True),
+    "job_description": request.job_description,
     "generated_resume": {},
     "score": 0,
-    "attempts": 0
+    "attempts": 0,
+    "no_cache": request.no_cache
     }
-    # Query the LLM for the generated resume
-    
-    result_state = resume_graph.invoke(initial_state)
-    final_resume = result_state["generated_resume"]
 
+def validate_generated(final_resume: dict) -> ResumeCreate:
     # Validate the JSON data against the ResumeCreate schema
     try:
-        generated_resume = ResumeCreate(**final_resume)
+        return ResumeCreate(**final_resume)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Invalid generated resume data: {str(e)}")
 
+@router.post("/generate-resume", response_model=GeneratedResumeResponse, dependencies=[Depends(query_budget(9))])
+async def generate_resume(request: GenerateResumeRequest, db: AsyncSession = Depends(get_async_db), user: CurrentUser = Depends(get_current_user)):
+    # Retrieve the user's profile from the database
+    profile = await load_profile_async(db, user.id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="User profile not found")
+
+    # Query the LLM for the generated resume
+    with llm_deadline():
+        result_state = await resume_graph.ainvoke(generation_state(profile, request))
+    generated_resume = validate_generated(result_state["generated_resume"])
+
     # Return the generated resume
-    return GeneratedResumeResponse(generated_resume=generated_resume)
\ No newline at end of file
+    return GeneratedResumeResponse(generated_resume=generated_resume)
+
+async def run_generation(job: Job, initial_state: dict) -> dict:
+    """Run the resume graph, reporting each finished node as a progress event of the job."""
+    final_resume = {}
+    with llm_deadline():
+        async for update in resume_graph.astream(initial_state, stream_mode="updates"):
+            for node, state in update.items():
+                final_resume = state.get("generated_resume", final_resume)
+                job.emit("progress", {
+                    "node": node,
+                    "attempts": state.get("attempts"),
+                    "score": state.get("score"),
+                    "score_source": state.get("score_source"),
+                    "weak_sections": sorted(state.get("section_feedback") or {}),
+                })
+    return validate_generated(final_resume).model_dump(mode="json")
+
+def job_response(job: Job) -> GenerationJobResponse:
+    return GenerationJobResponse(
+        job_id=job.id,
+        status=job.status,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+        progress=[event.data for event in job.events if event.event == "progress"],
+        result=job.result,
+        error=job.error,
+    )
+
+def get_job(job_id: uuid.UUID, user: CurrentUser) -> Job:
+    job = generation_jobs.get(job_id, user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("/generate-resume/jobs", response_model=GenerationJobResponse, status_code=202, dependencies=[Depends(query_budget(7))])
+async def create_generation_job(request: GenerateResumeRequest, db: AsyncSession = Depends(get_async_db), user: CurrentUser = Depends(get_current_user)):
+    """
+    Start /generate-resume in the background and return its job id right away.
+    Poll GET /generate-resume/jobs/{job_id} or follow /generate-resume/jobs/{job_id}/events.
+    """
+    profile = await load_profile_async(db, user.id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="User profile not found")
+    initial_state = generation_state(profile, request)
+    try:
+        job = generation_jobs.submit(user.id, lambda job: run_generation(job, initial_state))
+    except JobQueueFull:
+        raise HTTPException(status_code=503, detail="Too many resume generations in progress, please retry", headers={"Retry-After": "10"})
+    return job_response(job)
+
+@router.get("/generate-resume/jobs/{job_id}", response_model=GenerationJobResponse)
+async def get_generation_job(job_id: uuid.UUID, user: CurrentUser = Depends(get_current_user)):
+    return job_response(get_job(job_id, user))
+
+@router.get("/generate-resume/jobs/{job_id}/events")
+async def stream_generation_job(job_id: uuid.UUID, user: CurrentUser = Depends(get_current_user)):
+    """
+    Server-sent events of a job: ``status`` changes, one ``progress`` event per graph
+    node, then ``result`` (the ResumeCreate) or ``error``. Events already emitted are
+    replayed first, so the stream can be opened at any time.
+    """
+    job = get_job(job_id, user)
+
+    async def events():
+        async for event in job.subscribe():
+            yield sse_event(event.event, event.data)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -1,104 +1,201 @@
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
-from database import get_db
-from models import Resume, User
-from schemas import GeneratePDFRequest
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
+from schemas import GeneratePDFRequest, GenerateBatchPDFRequest, TemplateResponse
 from utils import get_current_user
-from jinja2 import Template, Environment, FileSystemLoader
-import pdfkit
+from user_cache import CurrentUser
+from resume_loader import load_resume_async, load_resumes_async, serialize_resume
+from query_budget import query_budget
+from template_registry import template_registry, UnknownTemplate, InvalidTemplate
+from render_pool import render_pool, RenderPoolFull, RenderTimeout
+from pdf_cache import pdf_cache, cache_key
+import asyncio
 import os
+import re
+import time
 import uuid
-from datetime import date
+import zipfile
+from typing import List
+from dotenv import load_dotenv
+load_dotenv()
 
 router = APIRouter()
 
-# Set up Jinja2 environment
-env = Environment(loader=FileSystemLoader("templates"))
+PDF_BATCH_MAX_ITEMS = int(os.getenv("PDF_BATCH_MAX_ITEMS", "20"))
 
-# Custom filter for date formatting
-def format_date(value, format_string="%b %Y"):
-    if isinstance(value, date) and value:
-        return value.strftime(format_string)
-    return "Present" if format_string == "%b %Y" else ""
+async def load_resume_data(resume_id: uuid.UUID, db: AsyncSession, user: CurrentUser) -> dict:
+    """Load the resume with all its sections, serialized for the templates."""
+    resume = await load_resume_async(db, resume_id, user.id)
+    if not resume:
+        raise HTTPException(status_code=404, detail="Resume not found or not owned by user")
+    return serialize_resume(resume)
+
+async def load_resumes_data(resume_ids: List[uuid.UUID], db: AsyncSession, user: CurrentUser) -> dict:
+    """Load several resumes at once, keyed by id. Fails if any of them is missing."""
+    found = {resume.id: resume for resume in await load_resumes_async(db, resume_ids, user.id)}
+    missing = [str(resume_id) for resume_id in resume_ids if resume_id not in found]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Resumes not found or not owned by user: {', '.join(missing)}")
+    return {resume_id: serialize_resume(resume) for resume_id, resume in found.items()}
+
+def load_template(template_id: str):
+    """Return the precompiled template and its source hash, the latter being part of the PDF cache key."""
+    try:
+        return template_registry.get(template_id)
+    except UnknownTemplate:
+        raise HTTPException(status_code=404, detail=f"Template not found: {template_id}")
+    except InvalidTemplate as e:
+        raise HTTPException(status_code=500, detail=f"Template {template_id} is invalid: {e}")
+
+def pdf_response(pdf: bytes, headers: dict) -> Response:
+    return Response(
+        content=pdf,
+        media_type="application/pdf",
+        headers={"Content-Disposition": 'attachment; filename="resume.pdf"', **headers},
+    )
+
+async def render_pdf(resume_id: uuid.UUID, resume_data: dict, template_id: str):
+    """
+    Return ``(pdf, render_result)`` for a resume rendered with a template.
+
+    Unchanged resume + unchanged template are served from the PDF cache, in which
+    case ``render_result`` is None. Otherwise wkhtmltopdf runs in the dedicated
+    render pool and this coroutine only waits on the result.
+    """
+    template, source_hash = load_template(template_id)
+    key = cache_key(resume_data, template_id, source_hash)
+    cached_pdf = await run_in_threadpool(pdf_cache.get, resume_id, key)
+    if cached_pdf is not None:
+        return cached_pdf, None
+
+    html = template.render(resume=resume_data)
+    result = await render_pool.render(html)
+    await run_in_threadpool(pdf_cache.put, resume_id, key, result.pdf)
+    return result.pdf, result
+
+class _ZipStream:
+    """Write-only file object for zipfile; collects what was written until drained."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
 
-env.filters["strftime"] = format_date
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
 
-@router.post("/generate-resume-pdf")
-def generate_resume(request: GeneratePDFRequest, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+def archive_name(index: int, title: str, template_id: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", title or "").strip("-") or "resume"
+    return f"{index + 1:02d}-{slug}-{template_id}.pdf"
+
+@router.get("/templates", response_model=List[TemplateResponse])
+def list_templates():
+    return template_registry.list()
+
+@router.post("/generate-resume-pdf", dependencies=[Depends(query_budget(7))])
+async def generate_resume(request: GeneratePDFRequest, db: AsyncSession = Depends(get_async_db), user: CurrentUser = Depends(get_current_user)):
     # Validate resume_id
     try:
         resume_id = uuid.UUID(str(request.resume_id))
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid resume ID")
 
-    # Fetch resume from database
-    resume = db.query(Resume).filter(Resume.id == resume_id, Resume.user_id == user.id).first()
-    if not resume:
-        raise HTTPException(status_code=404, detail="Resume not found or not owned by user")
-
-    # Prepare resume data with all sections
-    resume_data = {
-        "title": resume.title,
-        "personal_info": resume.personal_info or {},  # Handle case where personal_info is None
-        "experiences": [
-            {
-                "title": e.title,
-                "company": e.company,
-                "description": e.description,
-                "start_date": e.start_date,
-                "end_date": e.end_date
-            }
-            for e in resume.experiences
-        ],
-        "educations": [
-            {
-                "school": edu.school,
-                "degree": edu.degree,
-                "start_date": edu.start_date,
-                "end_date": edu.end_date,
-                "used_skills": edu.used_skills,
-            }
-            for edu in resume.educations
-        ],
-        "skills": [
-            {"skill_name": s.skill_name}
-            for s in resume.skills
-        ],
-        "certifications": [
-            {
-                "title": cert.title,
-                "authority": cert.authority,
-                "date": cert.date
-            }
-            for cert in resume.certifications
-        ],
-        "projects": [
-            {
-                "title": proj.title,
-                "description": proj.description,
-                "link": proj.link,
-                "used_skills": proj.used_skills,
-            }
-            for proj in resume.projects
-        ]
-    }
-
-    # Load and render HTML template
-    template_path = f"{request.template_id}.html"
+    resume_data = await load_resume_data(resume_id, db, user)
     try:
-        template = env.get_template(template_path)
+        pdf, result = await render_pdf(resume_id, resume_data, request.template_id)
+    except HTTPException:
+        raise
+    except RenderPoolFull:
+        raise HTTPException(status_code=503, detail="PDF renderer is busy, please retry", headers={"Retry-After": "5"})
+    except RenderTimeout:
+        raise HTTPException(status_code=504, detail="PDF generation timed out")
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Template not found: {template_path}")
+        raise HTTPException(status_code=500, detail="Failed to generate PDF")
 
-    html = template.render(resume=resume_data)
+    if result is None:
+        return pdf_response(pdf, {"X-Cache": "HIT"})
+    return pdf_response(pdf, {
+        "X-Cache": "MISS",
+        "Server-Timing": f"pdf-queue;dur={result.queue_wait * 1000:.1f}, pdf-render;dur={result.render_time * 1000:.1f}",
+    })
 
-    # Generate unique PDF filename to avoid overwrites
-    pdf_filename = f"resume_{uuid.uuid4()}.pdf"
-    try:
-        pdfkit.from_string(html, pdf_filename)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail="Failed to generate PDF")
+@router.post("/generate-resume-pdf/batch", dependencies=[Depends(query_budget(7))])
+async def generate_resume_batch(request: GenerateBatchPDFRequest, db: AsyncSession = Depends(get_async_db), user: CurrentUser = Depends(get_current_user)):
+    """
+    Render several (resume, template) pairs concurrently and stream them back as a ZIP.
+
+    Everything that can fail cleanly (ownership, unknown templates) is checked before
+    the first byte is sent. Once streaming, a PDF that fails to render is listed in
+    ``errors.txt`` inside the archive instead of aborting the whole download.
+    """
+    items = request.items
+    if not items:
+        raise HTTPException(status_code=400, detail="No resumes to export")
+    if len(items) > PDF_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {PDF_BATCH_MAX_ITEMS} PDFs can be exported at once")
+    for template_id in {item.template_id for item in items}:
+        load_template(template_id)
+    resume_ids = list({item.resume_id for item in items})
+    resumes_data = await load_resumes_data(resume_ids, db, user)
+
+    async def render_item(index: int, item: GeneratePDFRequest):
+        resume_data = resumes_data[item.resume_id]
+        name = archive_name(index, resume_data["title"], item.template_id)
+        deadline = time.monotonic() + render_pool.timeout
+        while True:
+            try:
+                pdf, _ = await render_pdf(item.resume_id, resume_data, item.template_id)
+                return name, pdf, None
+            except RenderPoolFull:
+                # Other requests own the queue right now; a batch waits for room instead of failing.
+                if time.monotonic() >= deadline:
+                    return name, None, "PDF renderer is busy"
+                await asyncio.sleep(0.5)
+            except RenderTimeout:
+                return name, None, "PDF generation timed out"
+            except Exception as e:
+                return name, None, "Failed to generate PDF"
+
+    async def stream_archive():
+        # Only as many renders in flight as the pool has workers, so at most that many
+        # PDFs are held in memory no matter how large the archive gets.
+        window = max(render_pool.workers, 1)
+        stream = _ZipStream()
+        errors = []
+        pending = set()
+        try:
+            with zipfile.ZipFile(stream, mode="w", compression=zipfile.ZIP_STORED) as archive:
+                queue = list(enumerate(items))
+                while queue or pending:
+                    while queue and len(pending) < window:
+                        pending.add(asyncio.ensure_future(render_item(*queue.pop(0))))
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        name, pdf, error = task.result()
+                        if error:
+                            errors.append(f"{name}: {error}")
+                            continue
+                        archive.writestr(name, pdf)
+                        yield stream.drain()
+                if errors:
+                    archive.writestr("errors.txt", "\n".join(errors) + "\n")
+            yield stream.drain()
+        finally:
+            # Client went away mid-download: stop waiting on the remaining renders.
+            for task in pending:
+                task.cancel()
 
-    # Return the PDF file as a response
-    return FileResponse(pdf_filename, media_type="application/pdf", filename="resume.pdf")
\ No newline at end of file
+    return StreamingResponse(
+        stream_archive(),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="resumes.zip"'},
+    )
\ No newline at end of file
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+from dotenv import load_dotenv
+load_dotenv()
+
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", ".cache/pdf")
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+def cache_key(resume_data: dict, template_id: str, template_hash: str) -> str:
+    """Content address of a rendered PDF: the serialized resume plus the template it is rendered with."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(resume_data, sort_keys=True, default=str).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(template_id.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(template_hash.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class PdfCache:
+    """
+    Size-bounded LRU cache of rendered PDFs on local disk.
+
+    Files are named ``<resume_id>_<key>.pdf`` so every artifact of a resume can be
+    dropped when the resume changes, and so the cache survives restarts and can be
+    shared by several workers on the same host. Each process keeps its own LRU
+    index; a file evicted by another worker is simply treated as a miss.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # filename -> size in bytes, least recently used first
+        self._size = 0
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _filename(self, resume_id: uuid.UUID, key: str) -> str:
+        return f"{resume_id}_{key}.pdf"
+
+    def _load(self):
+        # Rebuild the LRU order from disk once, oldest access first.
+        if self._loaded:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".pdf"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._size += size
+        self._loaded = True
+
+    def _forget(self, name: str):
+        self._size -= self._entries.pop(name, 0)
+
+    def _evict(self):
+        while self._size > self.max_bytes and self._entries:
+            name, size = self._entries.popitem(last=False)
+            self._size -= size
+            self.evictions += 1
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def get(self, resume_id: uuid.UUID, key: str) -> Optional[bytes]:
+        name = self._filename(resume_id, key)
+        path = os.path.join(self.directory, name)
+        with self._lock:
+            self._load()
+            try:
+                with open(path, "rb") as f:
+                    pdf = f.read()
+            except FileNotFoundError:
+                self._forget(name)
+                self.misses += 1
+                return None
+            if name not in self._entries:
+                # Written by another worker since we scanned the directory.
+                self._entries[name] = len(pdf)
+                self._size += len(pdf)
+            self._entries.move_to_end(name)
+            self.hits += 1
+        # Bump mtime so the LRU order survives a restart.
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return pdf
+
+    def put(self, resume_id: uuid.UUID, key: str, pdf: bytes):
+        name = self._filename(resume_id, key)
+        path = os.path.join(self.directory, name)
+        with self._lock:
+            self._load()
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(pdf)
+            os.replace(tmp_path, path)
+            self._forget(name)
+            self._entries[name] = len(pdf)
+            self._size += len(pdf)
+            self._evict()
+
+    def invalidate(self, resume_id: uuid.UUID):
+        """Drop every cached PDF of a resume, whatever template it was rendered with."""
+        prefix = f"{resume_id}_"
+        with self._lock:
+            self._load()
+            for name in [name for name in self._entries if name.startswith(prefix)]:
+                self._forget(name)
+            for entry in os.scandir(self.directory):
+                if entry.name.startswith(prefix):
+                    try:
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+pdf_cache = PdfCache(directory=PDF_CACHE_DIR, max_bytes=PDF_CACHE_MAX_BYTES)
@@ -0,0 +1,68 @@
+import logging
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from fastapi import Request
+from dotenv import load_dotenv
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Tests set this so that an endpoint going over its budget fails instead of logging a warning
+SQL_QUERY_BUDGET_STRICT = os.getenv("SQL_QUERY_BUDGET_STRICT", "false").lower() in ("1", "true", "yes")
+
+_current_counter = ContextVar("sql_query_counter", default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+
+def count_query(statement: str):
+    """Called for every statement by the SQL listener of metrics.instrument_sql."""
+    counter = _current_counter.get()
+    if counter is not None:
+        counter.count += 1
+        counter.statements.append(statement)
+
+
+@contextmanager
+def count_queries():
+    """Count the SQL statements executed inside the block, e.g. ``with count_queries() as counter:``."""
+    counter = QueryCounter()
+    token = _current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_counter.reset(token)
+
+
+def check_budget(counter: QueryCounter, limit: int, name: str):
+    if counter.count <= limit:
+        return
+    message = f"{name} ran {counter.count} SQL queries, budget is {limit}:\n" + "\n".join(counter.statements)
+    if SQL_QUERY_BUDGET_STRICT:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+def query_budget(limit: int):
+    """
+    Route dependency declaring the maximum number of SQL queries an endpoint may run,
+    authentication included: ``dependencies=[Depends(query_budget(7))]``.
+
+    The counter lives in a context variable, which the threadpool running sync
+    dependencies and endpoints inherits, so every query of the request is counted.
+    """
+    async def dependency(request: Request):
+        counter = QueryCounter()
+        _current_counter.set(counter)
+        yield counter
+        check_budget(counter, limit, f"{request.method} {request.url.path}")
+    return dependency
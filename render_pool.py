@@ -0,0 +1,187 @@
+import asyncio
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import pdfkit
+from dotenv import load_dotenv
+
+from metrics import pdf_queue_wait, pdf_render_duration, pdf_renders, pdf_renders_in_flight
+load_dotenv()
+
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "2"))
+PDF_RENDER_QUEUE_DEPTH = int(os.getenv("PDF_RENDER_QUEUE_DEPTH", "16"))
+PDF_RENDER_TIMEOUT = float(os.getenv("PDF_RENDER_TIMEOUT", "30"))
+
+
+class RenderPoolFull(Exception):
+    """Raised when every worker is busy and the wait queue is at capacity."""
+
+
+class RenderTimeout(Exception):
+    """Raised when a job waits or renders for longer than the pool timeout."""
+
+
+@dataclass
+class RenderResult:
+    pdf: bytes
+    queue_wait: float  # seconds between submission and a worker picking the job up
+    render_time: float  # seconds spent inside wkhtmltopdf
+
+
+def html_to_pdf(html: str, timeout: float) -> bytes:
+    """Run wkhtmltopdf on an HTML string and return the PDF bytes.
+
+    Unlike ``pdfkit.from_string`` the subprocess is killed once ``timeout`` expires.
+    """
+    kit = pdfkit.PDFKit(html, "string", options={"quiet": ""})
+    result = subprocess.run(
+        kit.command(),
+        input=html.encode("utf-8"),
+        capture_output=True,
+        timeout=timeout,
+        env=kit.environ,
+    )
+    kit.handle_error(result.returncode, result.stderr.decode("utf-8", errors="replace"))
+    return result.stdout
+
+
+class PdfRenderPool:
+    """
+    Dedicated, bounded pool of wkhtmltopdf workers.
+
+    Request handlers submit rendered HTML and await the returned future, so they
+    never hold a threadpool slot while wkhtmltopdf runs. At most ``workers`` jobs
+    render at once and at most ``queue_depth`` more may wait; anything beyond
+    that is rejected immediately with RenderPoolFull.
+    """
+
+    def __init__(self, workers: int, queue_depth: int, timeout: float):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.timeout = timeout
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+        self._lock = threading.Lock()
+        self._stats = {
+            "rendered": 0,
+            "failed": 0,
+            "rejected": 0,
+            "timed_out": 0,
+            "in_flight": 0,
+            "queue_wait_total": 0.0,
+            "queue_wait_max": 0.0,
+            "render_time_total": 0.0,
+            "render_time_max": 0.0,
+        }
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pdf-render")
+            return self._executor
+
+    def _record(self, **increments):
+        with self._lock:
+            for key, value in increments.items():
+                self._stats[key] += value
+        for key, value in increments.items():
+            if key == "in_flight":
+                pdf_renders_in_flight.inc(value)
+            else:
+                pdf_renders.inc(value, outcome=key)
+
+    def _record_timings(self, queue_wait: float, render_time: float):
+        with self._lock:
+            self._stats["queue_wait_total"] += queue_wait
+            self._stats["queue_wait_max"] = max(self._stats["queue_wait_max"], queue_wait)
+            self._stats["render_time_total"] += render_time
+            self._stats["render_time_max"] = max(self._stats["render_time_max"], render_time)
+        pdf_queue_wait.observe(queue_wait)
+        pdf_render_duration.observe(render_time)
+
+    def _run(self, html: str, submitted_at: float) -> RenderResult:
+        started_at = time.perf_counter()
+        queue_wait = started_at - submitted_at
+        if queue_wait >= self.timeout:
+            # The caller has most likely given up already; don't spend a worker on it.
+            self._record(timed_out=1)
+            pdf_queue_wait.observe(queue_wait)
+            raise RenderTimeout(f"PDF job waited {queue_wait:.1f}s in the render queue")
+        try:
+            pdf = html_to_pdf(html, timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            self._record(timed_out=1)
+            raise RenderTimeout(f"wkhtmltopdf did not finish within {self.timeout}s")
+        except Exception:
+            self._record(failed=1)
+            raise
+        render_time = time.perf_counter() - started_at
+        self._record(rendered=1)
+        self._record_timings(queue_wait, render_time)
+        return RenderResult(pdf=pdf, queue_wait=queue_wait, render_time=render_time)
+
+    def _release(self, _future):
+        self._record(in_flight=-1)
+        self._slots.release()
+
+    async def render(self, html: str) -> RenderResult:
+        """Queue ``html`` for rendering and wait for the PDF without blocking the event loop."""
+        if not self._slots.acquire(blocking=False):
+            self._record(rejected=1)
+            raise RenderPoolFull("PDF render queue is full")
+        self._record(in_flight=1)
+        try:
+            future = self._get_executor().submit(self._run, html, time.perf_counter())
+        except Exception:
+            self._release(None)
+            raise
+        # The slot is only freed once the worker is done, even if the caller stops waiting.
+        future.add_done_callback(self._release)
+        try:
+            # Queue wait and rendering together, not one timeout each
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            if future.cancelled():
+                # Dropped before a worker picked it up, so _run never counted it
+                self._record(timed_out=1)
+            raise RenderTimeout(f"PDF job did not finish within {self.timeout}s")
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        completed = stats["rendered"] or 1
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "timeout_seconds": self.timeout,
+            "in_flight": stats["in_flight"],
+            "rendered": stats["rendered"],
+            "failed": stats["failed"],
+            "rejected": stats["rejected"],
+            "timed_out": stats["timed_out"],
+            "queue_wait_ms": {
+                "avg": round(stats["queue_wait_total"] / completed * 1000, 2),
+                "max": round(stats["queue_wait_max"] * 1000, 2),
+            },
+            "render_time_ms": {
+                "avg": round(stats["render_time_total"] / completed * 1000, 2),
+                "max": round(stats["render_time_max"] * 1000, 2),
+            },
+        }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+render_pool = PdfRenderPool(
+    workers=PDF_RENDER_WORKERS,
+    queue_depth=PDF_RENDER_QUEUE_DEPTH,
+    timeout=PDF_RENDER_TIMEOUT,
+)
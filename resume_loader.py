@@ -0,0 +1,118 @@
+import uuid
+from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from models import Resume, UserProfile
+
+# Child collections shared by Resume and UserProfile
+RESUME_SECTIONS = ("experiences", "educations", "skills", "certifications", "projects")
+
+def with_sections(model):
+    """Loader options that fetch every section with one SELECT ... WHERE parent_id IN (...) each."""
+    return [selectinload(getattr(model, section)) for section in RESUME_SECTIONS]
+
+def resume_statement(resume_id: uuid.UUID, user_id: uuid.UUID):
+    # populate_existing: a resume reloaded after a commit in the same session gets fresh sections
+    return (
+        select(Resume)
+        .options(*with_sections(Resume))
+        .where(Resume.id == resume_id, Resume.user_id == user_id)
+        .execution_options(populate_existing=True)
+    )
+
+def profile_statement(user_id: uuid.UUID):
+    return (
+        select(UserProfile)
+        .options(*with_sections(UserProfile))
+        .where(UserProfile.user_id == user_id)
+        .execution_options(populate_existing=True)
+    )
+
+def load_resume(db: Session, resume_id: uuid.UUID, user_id: uuid.UUID) -> Optional[Resume]:
+    """Load a resume owned by ``user_id`` together with all of its sections."""
+    return db.execute(resume_statement(resume_id, user_id)).scalars().first()
+
+async def load_resume_async(db: AsyncSession, resume_id: uuid.UUID, user_id: uuid.UUID) -> Optional[Resume]:
+    return (await db.execute(resume_statement(resume_id, user_id))).scalars().first()
+
+def resumes_statement(resume_ids: List[uuid.UUID], user_id: uuid.UUID):
+    return (
+        select(Resume)
+        .options(*with_sections(Resume))
+        .where(Resume.id.in_(resume_ids), Resume.user_id == user_id)
+    )
+
+def load_resumes(db: Session, resume_ids: List[uuid.UUID], user_id: uuid.UUID) -> List[Resume]:
+    """Same as load_resume for several resumes; the query count does not grow with the number of resumes."""
+    return db.execute(resumes_statement(resume_ids, user_id)).scalars().all()
+
+async def load_resumes_async(db: AsyncSession, resume_ids: List[uuid.UUID], user_id: uuid.UUID) -> List[Resume]:
+    return (await db.execute(resumes_statement(resume_ids, user_id))).scalars().all()
+
+def load_profile(db: Session, user_id: uuid.UUID) -> Optional[UserProfile]:
+    """Load the user's profile together with all of its sections."""
+    return db.execute(profile_statement(user_id)).scalars().first()
+
+async def load_profile_async(db: AsyncSession, user_id: uuid.UUID) -> Optional[UserProfile]:
+    return (await db.execute(profile_statement(user_id))).scalars().first()
+
+def serialize_sections(obj, iso_dates: bool = False) -> dict:
+    """
+    Serialize the personal info and sections of a Resume or UserProfile to plain dicts.
+
+    Dates stay ``date`` objects for template rendering; pass ``iso_dates=True`` when
+    the result is going to be dumped to JSON (e.g. into an LLM prompt).
+    """
+    def fmt(value):
+        if iso_dates and value is not None:
+            return value.isoformat()
+        return value
+
+    return {
+        "personal_info": obj.personal_info or {},  # Handle case where personal_info is None
+        "experiences": [
+            {
+                "title": e.title,
+                "company": e.company,
+                "description": e.description,
+                "start_date": fmt(e.start_date),
+                "end_date": fmt(e.end_date)
+            }
+            for e in obj.experiences
+        ],
+        "educations": [
+            {
+                "school": edu.school,
+                "degree": edu.degree,
+                "start_date": fmt(edu.start_date),
+                "end_date": fmt(edu.end_date),
+                "used_skills": edu.used_skills,
+            }
+            for edu in obj.educations
+        ],
+        "skills": [
+            {"skill_name": s.skill_name}
+            for s in obj.skills
+        ],
+        "certifications": [
+            {
+                "title": cert.title,
+                "authority": cert.authority,
+                "date": fmt(cert.date)
+            }
+            for cert in obj.certifications
+        ],
+        "projects": [
+            {
+                "title": proj.title,
+                "description": proj.description,
+                "link": proj.link,
+                "used_skills": proj.used_skills,
+            }
+            for proj in obj.projects
+        ]
+    }
+
+def serialize_resume(resume: Resume, iso_dates: bool = False) -> dict:
+    return {"title": resume.title, **serialize_sections(resume, iso_dates=iso_dates)}
@@ -1,19 +1,28 @@
 import uuid
+from datetime import datetime
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from database import get_db
-from models import Resume, Experience, Education, Skill, Certification, Project, User
-from schemas import ResumeCreate, ResumeResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import DateTime, String, delete, func, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
+from models import Resume, Experience, Education, Skill, Certification, Project, UserProfile
+from schemas import ResumeCreate, ResumeFromProfileRequest, ResumePatch, ResumeResponse
 from utils import get_current_user
+from user_cache import CurrentUser
+from resume_loader import load_resume_async
+from query_budget import query_budget
+from section_patch import PROFILE_SECTION_MODELS, RESUME_SECTION_MODELS, apply_sections_patch, touch
+from pdf_cache import pdf_cache
 
 router = APIRouter()
 
 @router.post("/resume", response_model=ResumeResponse)
-def create_resume(resume: ResumeCreate, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+async def create_resume(resume: ResumeCreate, db: AsyncSession = Depends(get_async_db), user: CurrentUser = Depends(get_current_user)):
     db_resume = Resume(user_id=user.id,title = resume.title, personal_info=resume.personal_info.dict())
     db.add(db_resume)
-    db.commit()
-    db.refresh(db_resume)
+    await db.commit()
+    await db.refresh(db_resume)
     for exp in resume.experiences:
         db.add(Experience(resume_id=db_resume.id, **exp.dict()))
     for edu in resume.educations:
@@ -24,26 +33,98 @@ def create_resume(resume: ResumeCreate, db: Session = Depends(get_db), user: Use
         db.add(Certification(resume_id=db_resume.id, **cert.dict()))
     for proj in resume.projects:
         db.add(Project(resume_id=db_resume.id, **proj.dict()))
-    db.commit()
-    return db_resume
+    await db.commit()
+    return await load_resume_async(db, db_resume.id, user.id)
 
-@router.get("/resume/{resume_id}", response_model=ResumeResponse)
-def get_resume(resume_id: uuid.UUID, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    resume = db.query(Resume).filter(Resume.id == resume_id, Resume.user_id == user.id).first()
-    print(resume)
+async def copy_profile_section(db: AsyncSession, section: str, resume_id: uuid.UUID, owner, item_ids: Optional[List[uuid.UUID]]):
+    """
+    Copy the items of one profile section (all of them, or those in ``item_ids``) into
+    the resume. Postgres generates the new ids, so the rows never leave the database;
+    other databases (SQLite in development and tests) copy them through one SELECT.
+    """
+    profile_model, resume_model = PROFILE_SECTION_MODELS[section], RESUME_SECTION_MODELS[section]
+    columns = [c.name for c in resume_model.__table__.columns if c.name not in ("id", "resume_id")]
+    source = (
+        select(*[getattr(profile_model, c) for c in columns])
+        .join(UserProfile, profile_model.profile_id == UserProfile.id)
+        .where(owner)
+    )
+    if item_ids is not None:
+        source = source.where(profile_model.id.in_(item_ids))
+
+    if db.bind.dialect.name == "postgresql":
+        rows = source.add_columns(func.gen_random_uuid(), literal(resume_id, Resume.id.type))
+        copied = (await db.execute(insert(resume_model).from_select([*columns, "id", "resume_id"], rows, include_defaults=False))).rowcount
+    else:
+        items = (await db.execute(source)).mappings().all()
+        if items:
+            await db.execute(insert(resume_model), [{**item, "id": uuid.uuid4(), "resume_id": resume_id} for item in items])
+        copied = len(items)
+
+    if item_ids is not None and copied != len(set(item_ids)):
+        found = set((await db.execute(
+            select(profile_model.id)
+            .join(UserProfile, profile_model.profile_id == UserProfile.id)
+            .where(owner, profile_model.id.in_(item_ids))
+        )).scalars())
+        unknown = ", ".join(str(item_id) for item_id in item_ids if item_id not in found)
+        raise HTTPException(status_code=422, detail=f"Unknown {section} ids in the user profile: {unknown}")
+
+@router.post("/resume/from-profile", response_model=ResumeResponse)
+async def create_resume_from_profile(request: ResumeFromProfileRequest, db: AsyncSession = Depends(get_async_db), user: CurrentUser = Depends(get_current_user)):
+    """
+    Create a resume from the user's profile in a single transaction: one INSERT ... SELECT
+    for the resume row and one per section (see copy_profile_section). Selected item
+    ids that aren't in the user's profile are rejected with a 422.
+    """
+    resume_id = uuid.uuid4()
+    now = datetime.utcnow()
+    owner = UserProfile.user_id == user.id
+    created = await db.execute(
+        insert(Resume).from_select(
+            ["id", "user_id", "title", "personal_info", "created_at", "updated_at"],
+            select(
+                literal(resume_id, Resume.id.type),
+                UserProfile.user_id,
+                literal(request.title, String()),
+                UserProfile.personal_info,
+                literal(now, DateTime()),
+                literal(now, DateTime()),
+            ).where(owner),
+            include_defaults=False,
+        )
+    )
+    if created.rowcount == 0:
+        raise HTTPException(status_code=404, detail="User profile not found")
+
+    for section in PROFILE_SECTION_MODELS:
+        item_ids = getattr(request.sections, section) if request.sections else None
+        if item_ids is not None and not item_ids:
+            continue
+        try:
+            await copy_profile_section(db, section, resume_id, owner, item_ids)
+        except HTTPException:
+            await db.rollback()
+            raise
+    await db.commit()
+    return await load_resume_async(db, resume_id, user.id)
+
+@router.get("/resume/{resume_id}", response_model=ResumeResponse, dependencies=[Depends(query_budget(7))])
+async def get_resume(resume_id: uuid.UUID, db: AsyncSession = Depends(get_async_db), user: CurrentUser = Depends(get_current_user)):
+    resume = await load_resume_async(db, resume_id, user.id)
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
     return resume
 
 @router.put("/resume/{resume_id}", response_model=ResumeResponse)
-def update_resume(resume_id: uuid.UUID, resume: ResumeCreate, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    db_resume = db.query(Resume).filter(Resume.id == resume_id, Resume.user_id == user.id).first()
+async def update_resume(resume_id: uuid.UUID, resume: ResumeCreate, db: AsyncSession = Depends(get_async_db), user: CurrentUser = Depends(get_current_user)):
+    db_resume = (await db.execute(select(Resume).where(Resume.id == resume_id, Resume.user_id == user.id))).scalars().first()
     if not db_resume:
         raise HTTPException(status_code=404, detail="Resume not found")
     db_resume.title = resume.title
     db_resume.personal_info = resume.personal_info.dict()
     for model in [Experience, Education, Skill, Certification, Project]:
-        db.query(model).filter(model.resume_id == resume_id).delete()
+        await db.execute(delete(model).where(model.resume_id == resume_id))
     for exp in resume.experiences:
         db.add(Experience(resume_id=resume_id, **exp.dict()))
     for edu in resume.educations:
@@ -54,15 +135,36 @@ def update_resume(resume_id: uuid.UUID, resume: ResumeCreate, db: Session = Depe
         db.add(Certification(resume_id=resume_id, **cert.dict()))
     for proj in resume.projects:
         db.add(Project(resume_id=resume_id, **proj.dict()))
-    db.commit()
-    db.refresh(db_resume)
-    return db_resume
+    await db.commit()
+    await run_in_threadpool(pdf_cache.invalidate, resume_id)
+    return await load_resume_async(db, resume_id, user.id)
+
+@router.patch("/resume/{resume_id}", response_model=ResumeResponse)
+async def patch_resume(resume_id: uuid.UUID, patch: ResumePatch, db: AsyncSession = Depends(get_async_db), user: CurrentUser = Depends(get_current_user)):
+    """
+    Apply per-section changes (add, update by id, remove by id) in one transaction,
+    touching only the rows that actually changed.
+    """
+    values = {}
+    if patch.title is not None:
+        values["title"] = patch.title
+    if patch.personal_info is not None:
+        values["personal_info"] = patch.personal_info.dict()
+    # Updating the parent first doubles as the ownership check
+    if not await touch(db, Resume, [Resume.id == resume_id, Resume.user_id == user.id], **values):
+        raise HTTPException(status_code=404, detail="Resume not found")
+    await apply_sections_patch(db, RESUME_SECTION_MODELS, "resume_id", resume_id, patch)
+    await db.commit()
+    await run_in_threadpool(pdf_cache.invalidate, resume_id)
+    return await load_resume_async(db, resume_id, user.id)
 
 @router.delete("/resume/{resume_id}")
-def delete_resume(resume_id: uuid.UUID, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    resume = db.query(Resume).filter(Resume.id == resume_id, Resume.user_id == user.id).first()
+async def delete_resume(resume_id: uuid.UUID, db: AsyncSession = Depends(get_async_db), user: CurrentUser = Depends(get_current_user)):
+    # Sections are loaded up front so the delete-orphan cascade doesn't lazy load them
+    resume = await load_resume_async(db, resume_id, user.id)
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
-    db.delete(resume)
-    db.commit()
+    await db.delete(resume)
+    await db.commit()
+    await run_in_threadpool(pdf_cache.invalidate, resume_id)
     return {"message": "Resume deleted"}
\ No newline at end of file
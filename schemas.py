@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, EmailStr, model_validator
+from typing import Optional, List, Dict, Any, ClassVar, FrozenSet
 from datetime import date, datetime
+from datetime import date as date_type  # for fields named "date", whose default would shadow the type
 import uuid
 
 # Authentication Schemas
@@ -155,6 +156,19 @@ class ResumeCreate(BaseModel):
     certifications: List[CertificationBase] = []
     projects: List[ProjectBase] = []
 
+# Copy a resume out of the user's profile. For each section, None copies every item,
+# a list copies only the items with those profile item ids.
+class ProfileSectionSelection(BaseModel):
+    experiences: Optional[List[uuid.UUID]] = None
+    educations: Optional[List[uuid.UUID]] = None
+    skills: Optional[List[uuid.UUID]] = None
+    certifications: Optional[List[uuid.UUID]] = None
+    projects: Optional[List[uuid.UUID]] = None
+
+class ResumeFromProfileRequest(BaseModel):
+    title: str
+    sections: Optional[ProfileSectionSelection] = None
+
 # Response Schemas for Resume Related Models
 class ExperienceResponse(ExperienceBase):
     id: uuid.UUID
@@ -201,13 +215,100 @@ class ResumeResponse(BaseModel):
     class Config:
         orm_mode = True
 
+# Section patch Schemas: add new items, update items by id, remove items by id
+class ItemPatch(BaseModel):
+    # Fields may be left out, but only the nullable columns may be set to null
+    nullable: ClassVar[FrozenSet[str]] = frozenset()
+
+    @model_validator(mode="after")
+    def reject_null_for_required_fields(self):
+        nulls = sorted(name for name in self.model_fields_set if getattr(self, name) is None and name not in self.nullable)
+        if nulls:
+            raise ValueError(f"{', '.join(nulls)} cannot be null")
+        return self
+
+class ExperiencePatch(ItemPatch):
+    nullable = frozenset({"end_date"})
+    id: uuid.UUID
+    title: Optional[str] = None
+    company: Optional[str] = None
+    description: Optional[str] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+class EducationPatch(ItemPatch):
+    nullable = frozenset({"end_date"})
+    id: uuid.UUID
+    school: Optional[str] = None
+    degree: Optional[str] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    used_skills: Optional[List[str]] = None
+
+class SkillPatch(ItemPatch):
+    id: uuid.UUID
+    skill_name: Optional[str] = None
+
+class CertificationPatch(ItemPatch):
+    id: uuid.UUID
+    title: Optional[str] = None
+    authority: Optional[str] = None
+    date: Optional[date_type] = None
+
+class ProjectPatch(ItemPatch):
+    nullable = frozenset({"link"})
+    id: uuid.UUID
+    title: Optional[str] = None
+    description: Optional[str] = None
+    link: Optional[str] = None
+    used_skills: Optional[List[str]] = None
+
+class ExperienceSectionPatch(BaseModel):
+    add: List[ExperienceBase] = []
+    update: List[ExperiencePatch] = []
+    remove: List[uuid.UUID] = []
+
+class EducationSectionPatch(BaseModel):
+    add: List[EducationBase] = []
+    update: List[EducationPatch] = []
+    remove: List[uuid.UUID] = []
+
+class SkillSectionPatch(BaseModel):
+    add: List[SkillBase] = []
+    update: List[SkillPatch] = []
+    remove: List[uuid.UUID] = []
+
+class CertificationSectionPatch(BaseModel):
+    add: List[CertificationBase] = []
+    update: List[CertificationPatch] = []
+    remove: List[uuid.UUID] = []
+
+class ProjectSectionPatch(BaseModel):
+    add: List[ProjectBase] = []
+    update: List[ProjectPatch] = []
+    remove: List[uuid.UUID] = []
+
+# Resume and UserProfile sections share the same shape, so both use the patches above
+class UserProfilePatch(BaseModel):
+    personal_info: Optional[PersonalInfo] = None
+    experiences: Optional[ExperienceSectionPatch] = None
+    educations: Optional[EducationSectionPatch] = None
+    skills: Optional[SkillSectionPatch] = None
+    certifications: Optional[CertificationSectionPatch] = None
+    projects: Optional[ProjectSectionPatch] = None
+
+class ResumePatch(UserProfilePatch):
+    title: Optional[str] = None
+
 # Optimization Schemas
 class OptimizeRequest(BaseModel):
     resume_id: uuid.UUID
     job_description: str
+    no_cache: bool = False  # ignore cached LLM responses and ask the model again
 
 class GenerateResumeRequest(BaseModel):
     job_description: str
+    no_cache: bool = False  # ignore cached LLM responses and ask the model again
     
 class OptimizeResponse(BaseModel):
     suggestions: str
@@ -218,6 +319,14 @@ class GeneratePDFRequest(BaseModel):
     resume_id: uuid.UUID
     template_id: str
 
+class GenerateBatchPDFRequest(BaseModel):
+    items: List[GeneratePDFRequest]
+
+class TemplateResponse(BaseModel):
+    template_id: str
+    valid: bool
+    error: Optional[str] = None
+
 # Application Schemas
 class ApplicationCreate(BaseModel):
     resume_id: Optional[uuid.UUID] = None
@@ -235,4 +344,49 @@ class ApplicationResponse(BaseModel):
     status: str
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+# Dashboard Schemas
+class ResumeSummary(BaseModel):
+    id: uuid.UUID
+    title: str
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        orm_mode = True
+
+class ResumePage(BaseModel):
+    items: List[ResumeSummary]
+    next_cursor: Optional[str] = None
+
+class ApplicationPage(BaseModel):
+    items: List[ApplicationResponse]
+    next_cursor: Optional[str] = None
+
+class ApplicationStatusCount(BaseModel):
+    status: Optional[str]
+    count: int
+    latest_application_date: Optional[date]
+
+class DashboardSummary(BaseModel):
+    resume_count: int
+    application_count: int
+    applications_by_status: List[ApplicationStatusCount]
+    last_resume_update: Optional[datetime]
+    last_application_date: Optional[date]
+
+class DashboardResponse(BaseModel):
+    summary: DashboardSummary
+    resumes: ResumePage
+    applications: ApplicationPage
+
+# Background /generate-resume jobs
+class GenerationJobResponse(BaseModel):
+    job_id: uuid.UUID
+    status: str  # queued, running, succeeded or failed
+    created_at: datetime
+    updated_at: datetime
+    progress: List[Dict[str, Any]] = []  # one entry per finished graph node
+    result: Optional[ResumeCreate] = None
+    error: Optional[str] = None
@@ -0,0 +1,64 @@
+from datetime import datetime
+from fastapi import HTTPException
+from sqlalchemy import delete, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import (
+    Experience, Education, Skill, Certification, Project,
+    UserExperience, UserEducation, UserSkill, UserCertification, UserProject,
+)
+
+RESUME_SECTION_MODELS = {
+    "experiences": Experience,
+    "educations": Education,
+    "skills": Skill,
+    "certifications": Certification,
+    "projects": Project,
+}
+
+PROFILE_SECTION_MODELS = {
+    "experiences": UserExperience,
+    "educations": UserEducation,
+    "skills": UserSkill,
+    "certifications": UserCertification,
+    "projects": UserProject,
+}
+
+async def apply_section_patch(db: AsyncSession, model, parent_key: str, parent_id, section) -> bool:
+    """
+    Apply one section's add/update/remove changes with the fewest statements:
+    one DELETE for all removals, one UPDATE per changed item (only the fields sent)
+    and one multi-row INSERT for all additions. Returns whether anything was written.
+    """
+    parent_column = getattr(model, parent_key)
+    changed = False
+    if section.remove:
+        remove_ids = set(section.remove)
+        result = await db.execute(delete(model).where(parent_column == parent_id, model.id.in_(remove_ids)))
+        if result.rowcount != len(remove_ids):
+            raise HTTPException(status_code=404, detail=f"Item to remove not found in {model.__tablename__}")
+        changed = True
+    for item in section.update:
+        values = item.dict(exclude_unset=True, exclude={"id"})
+        if not values:
+            continue
+        result = await db.execute(update(model).where(model.id == item.id, parent_column == parent_id).values(**values))
+        if result.rowcount == 0:
+            raise HTTPException(status_code=404, detail=f"Item {item.id} not found in {model.__tablename__}")
+        changed = True
+    if section.add:
+        await db.execute(insert(model), [{parent_key: parent_id, **item.dict()} for item in section.add])
+        changed = True
+    return changed
+
+async def apply_sections_patch(db: AsyncSession, section_models: dict, parent_key: str, parent_id, patch) -> bool:
+    changed = False
+    for name, model in section_models.items():
+        section = getattr(patch, name)
+        if section is not None:
+            changed = await apply_section_patch(db, model, parent_key, parent_id, section) or changed
+    return changed
+
+async def touch(db: AsyncSession, model, where, **values) -> bool:
+    """Bump ``updated_at`` of the parent row (plus any changed columns); False if no row matched."""
+    result = await db.execute(update(model).where(*where).values(updated_at=datetime.utcnow(), **values))
+    return result.rowcount > 0
@@ -0,0 +1,9 @@
+import json
+
+# Keep proxies (nginx) from buffering the stream and clients from caching it
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_event(event: str, data) -> str:
+    """One server-sent event; ``data`` is sent as JSON."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
@@ -0,0 +1,130 @@
+import hashlib
+import os
+import threading
+from dataclasses import dataclass, asdict
+from datetime import date
+from typing import Callable, Optional
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template, TemplateError
+from dotenv import load_dotenv
+load_dotenv()
+
+TEMPLATES_DIR = os.getenv("TEMPLATES_DIR", "templates")
+TEMPLATES_BYTECODE_CACHE_DIR = os.getenv("TEMPLATES_BYTECODE_CACHE_DIR", ".cache/jinja")
+TEMPLATES_AUTO_RELOAD = os.getenv("TEMPLATES_AUTO_RELOAD", "false").lower() in ("1", "true", "yes")
+
+
+class UnknownTemplate(Exception):
+    """Raised when no template is registered under the requested id."""
+
+
+class InvalidTemplate(Exception):
+    """Raised when a template exists but failed to compile."""
+
+
+# Custom filter for date formatting
+def format_date(value, format_string="%b %Y"):
+    if isinstance(value, date) and value:
+        return value.strftime(format_string)
+    return "Present" if format_string == "%b %Y" else ""
+
+
+@dataclass
+class TemplateInfo:
+    template_id: str
+    filename: str
+    source_hash: str
+    valid: bool
+    error: Optional[str] = None
+
+
+@dataclass
+class _Entry:
+    info: TemplateInfo
+    template: Optional[Template]
+    uptodate: Callable[[], bool]
+
+
+class TemplateRegistry:
+    """
+    Compiles every resume template once and keeps them ready for rendering.
+
+    Compiled bytecode is persisted with a FileSystemBytecodeCache, so a cold worker
+    loads it from disk instead of re-parsing the templates. Templates are validated
+    at ``warm()`` time; a broken one is listed as invalid rather than failing each
+    request. Files are only re-checked for changes when TEMPLATES_AUTO_RELOAD is set.
+    """
+
+    def __init__(self, directory: str, bytecode_cache_dir: str, auto_reload: bool):
+        os.makedirs(bytecode_cache_dir, exist_ok=True)
+        self.auto_reload = auto_reload
+        self.env = Environment(
+            loader=FileSystemLoader(directory),
+            bytecode_cache=FileSystemBytecodeCache(bytecode_cache_dir),
+            auto_reload=auto_reload,
+        )
+        self.env.filters["strftime"] = format_date
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._warmed = False
+
+    def _compile(self, template_id: str) -> _Entry:
+        filename = f"{template_id}.html"
+        source, _, uptodate = self.env.loader.get_source(self.env, filename)
+        uptodate = uptodate or (lambda: True)
+        source_hash = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        try:
+            template = self.env.get_template(filename)
+        except TemplateError as e:
+            line = f"line {e.lineno}: " if getattr(e, "lineno", None) else ""
+            info = TemplateInfo(template_id, filename, source_hash, valid=False, error=f"{line}{e.message}")
+            return _Entry(info=info, template=None, uptodate=uptodate)
+        info = TemplateInfo(template_id, filename, source_hash, valid=True)
+        return _Entry(info=info, template=template, uptodate=uptodate)
+
+    def warm(self):
+        """Compile and validate every ``*.html`` template in the templates directory."""
+        entries = {}
+        for filename in self.env.list_templates(extensions=["html"]):
+            template_id = filename[: -len(".html")]
+            entries[template_id] = self._compile(template_id)
+        with self._lock:
+            self._entries = entries
+            self._warmed = True
+
+    def get(self, template_id: str):
+        """Return the compiled template and a hash of its source."""
+        if not self._warmed:
+            self.warm()
+        with self._lock:
+            entry = self._entries.get(template_id)
+        if self.auto_reload:
+            stale = entry is None or not entry.uptodate()
+            if stale and os.path.basename(template_id) == template_id:
+                try:
+                    entry = self._compile(template_id)
+                except TemplateError:
+                    entry = None
+                with self._lock:
+                    if entry is None:
+                        self._entries.pop(template_id, None)
+                    else:
+                        self._entries[template_id] = entry
+        if entry is None:
+            raise UnknownTemplate(template_id)
+        if not entry.info.valid:
+            raise InvalidTemplate(entry.info.error)
+        return entry.template, entry.info.source_hash
+
+    def list(self) -> list:
+        if not self._warmed:
+            self.warm()
+        with self._lock:
+            return [asdict(entry.info) for entry in sorted(self._entries.values(), key=lambda e: e.info.template_id)]
+
+
+template_registry = TemplateRegistry(
+    directory=TEMPLATES_DIR,
+    bytecode_cache_dir=TEMPLATES_BYTECODE_CACHE_DIR,
+    auto_reload=TEMPLATES_AUTO_RELOAD,
+)
@@ -0,0 +1,117 @@
+import json
+import os
+import sys
+import tempfile
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The settings are read at import time, so they go in before any app module is imported.
+# Explicit values, even empty ones, also win over a developer's .env (load_dotenv doesn't override).
+_tmp = tempfile.mkdtemp(prefix="resume-maker-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_tmp}/app.db",
+    "ASYNC_DATABASE_URL": "",
+    "SECRET_KEY": "test",
+    "GEMINI_API_TOKEN": "test",
+    "LLM_BACKEND": "live",
+    "LLM_CACHE_PATH": f"{_tmp}/llm.sqlite3",
+    "LLM_CACHE_ENABLED": "true",
+    "LLM_CASSETTE_PATH": f"{_tmp}/llm_cassette.jsonl",
+    "LLM_RETRY_BASE_DELAY": "0.01",
+    "LLM_HEDGE_ENABLED": "false",
+    "ATS_EVALUATOR": "llm",
+    "PROMPT_COMPACT": "false",
+    "PROMPT_TOKEN_BUDGET": "0",
+    "PROMPT_TOKEN_BUDGETS": "",
+    "PDF_CACHE_DIR": f"{_tmp}/pdf",
+    "TEMPLATES_DIR": os.path.join(ROOT, "templates"),
+    "TEMPLATES_BYTECODE_CACHE_DIR": f"{_tmp}/jinja",
+    "PASSWORD_HASH_WORKERS": "1",
+    # An endpoint going over its SQL query budget fails the test instead of logging a warning
+    "SQL_QUERY_BUDGET_STRICT": "true",
+})
+
+from fastapi.testclient import TestClient
+
+import main
+from LLM.client import llm_client
+
+RESUME = {
+    "title": "Backend engineer",
+    "personal_info": {"full_name": "Jane Doe", "email": "jane@example.com", "phone": "+33 6 12 34 56 78"},
+    "experiences": [{"title": "Developer", "company": "Acme", "description": "Built APIs in Python", "start_date": "2020-01-01"}],
+    "educations": [{"school": "INSA", "degree": "MSc", "start_date": "2015-09-01", "end_date": "2020-06-30"}],
+    "skills": [{"skill_name": "Python"}, {"skill_name": "PostgreSQL"}],
+    "certifications": [{"title": "AWS Developer", "authority": "Amazon", "date": "2021-01-01"}],
+    "projects": [{"title": "Resume maker", "description": "FastAPI service", "used_skills": ["Python"]}],
+}
+KEY_POINTS = {"skills": ["Python", "PostgreSQL"], "expectations": ["Build backend services"]}
+
+
+class FakeModel:
+    """
+    Stands in for ``genai.GenerativeModel``. ``reply(prompt)`` answers by prompt
+    kind (key points, evaluation, anything else gets a resume) and can be replaced
+    by a test; every prompt is kept in ``prompts``.
+    """
+
+    def __init__(self):
+        self.prompts = []
+        self.reply = self.default_reply
+
+    @staticmethod
+    def default_reply(prompt: str) -> str:
+        if "HR specialist" in prompt:
+            return json.dumps(KEY_POINTS)
+        if "ATS evaluation assistant" in prompt:
+            return json.dumps({"score": 90, "sections": {}})
+        return json.dumps(RESUME)
+
+    async def generate_content_async(self, prompt, stream=False):
+        self.prompts.append(prompt)
+        text = self.reply(prompt)
+        if isinstance(text, Exception):
+            raise text
+        usage = SimpleNamespace(prompt_token_count=len(prompt) // 4, candidates_token_count=len(text) // 4)
+        if stream:
+            return self._chunks(text, usage)
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+    @staticmethod
+    async def _chunks(text: str, usage, size: int = 40):
+        pieces = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+        for index, piece in enumerate(pieces):
+            yield SimpleNamespace(text=piece, usage_metadata=usage if index == len(pieces) - 1 else None)
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    model = FakeModel()
+    monkeypatch.setattr(llm_client, "model", lambda name: model)
+    return model
+
+
+@pytest.fixture
+def auth_headers(client):
+    """A freshly registered user; their token is not in the auth cache yet."""
+    response = client.post("/register", json={"name": "Jane", "email": f"{uuid.uuid4().hex}@example.com", "password": "secret"})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def resume_id(client, auth_headers):
+    response = client.post("/resume", json=RESUME, headers=auth_headers)
+    assert response.status_code == 200
+    return response.json()["id"]
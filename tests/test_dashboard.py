@@ -0,0 +1,66 @@
+from conftest import RESUME
+
+
+def collect(client, path, headers, **params):
+    """Every item of a paginated list, following next_cursor."""
+    items, cursor = [], None
+    while True:
+        page = client.get(path, params={**params, **({"cursor": cursor} if cursor else {})}, headers=headers)
+        assert page.status_code == 200
+        items += page.json()["items"]
+        cursor = page.json()["next_cursor"]
+        if cursor is None:
+            return items
+
+
+def test_application_pages_cover_ties_once(client, auth_headers):
+    # Several applications on the same day: the id breaks the tie between pages
+    dates = ["2024-03-01"] * 4 + ["2024-02-01", "2024-01-01"] * 2
+    created = []
+    for index, application_date in enumerate(dates):
+        response = client.post("/application", json={
+            "job_title": f"Job {index}", "company_name": "Acme", "application_date": application_date, "status": "sent",
+        }, headers=auth_headers)
+        assert response.status_code == 200
+        created.append(response.json())
+
+    items = collect(client, "/dashboard/applications", auth_headers, limit=3)
+    assert sorted(item["id"] for item in items) == sorted(item["id"] for item in created)
+    assert [(item["application_date"], item["id"]) for item in items] == sorted(
+        ((item["application_date"], item["id"]) for item in created), reverse=True)
+
+
+def test_application_filters_apply_to_every_page(client, auth_headers):
+    for index in range(5):
+        client.post("/application", json={
+            "job_title": f"Job {index}", "company_name": "Acme", "application_date": f"2024-0{index + 1}-15",
+            "status": "interview" if index % 2 else "sent",
+        }, headers=auth_headers)
+    items = collect(client, "/dashboard/applications", auth_headers, limit=1, status="sent", date_from="2024-02-01")
+    assert [item["application_date"] for item in items] == ["2024-05-15", "2024-03-15"]
+
+
+def test_resume_pages(client, auth_headers):
+    ids = [client.post("/resume", json={**RESUME, "title": f"Resume {index}"}, headers=auth_headers).json()["id"] for index in range(5)]
+    items = collect(client, "/dashboard/resumes", auth_headers, limit=2)
+    assert [item["id"] for item in items] == ids[::-1]
+
+
+def test_invalid_cursor(client, auth_headers):
+    response = client.get("/dashboard/resumes", params={"cursor": "not-a-cursor"}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_dashboard_summary(client, auth_headers):
+    client.post("/resume", json=RESUME, headers=auth_headers)
+    for status in ("sent", "sent", "rejected"):
+        client.post("/application", json={
+            "job_title": "Job", "company_name": "Acme", "application_date": "2024-01-01", "status": status,
+        }, headers=auth_headers)
+    response = client.get("/dashboard", params={"limit": 2}, headers=auth_headers)
+    assert response.status_code == 200
+    summary = response.json()["summary"]
+    assert summary["resume_count"] == 1
+    assert summary["application_count"] == 3
+    assert {row["status"]: row["count"] for row in summary["applications_by_status"]} == {"sent": 2, "rejected": 1}
+    assert response.json()["applications"]["next_cursor"] is not None
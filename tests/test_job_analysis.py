@@ -0,0 +1,58 @@
+import asyncio
+import uuid
+
+import pytest
+
+from database import SessionLocal
+from LLM.agents import extract_key_points
+from LLM.job_analysis import find_key_points, fingerprint, validate_key_points
+from models import JobDescriptionAnalysis
+
+
+def unique_posting() -> str:
+    return f"Backend developer, Python and PostgreSQL. Ref {uuid.uuid4()}"
+
+
+@pytest.mark.parametrize("value", [
+    ["Python"],
+    {},
+    {"skills": ["Python"]},
+    {"skills": "Python", "expectations": []},
+    {"skills": [{"name": "Python"}], "expectations": []},
+])
+def test_malformed_key_points(value):
+    with pytest.raises(ValueError):
+        validate_key_points(value)
+
+
+def test_extra_keys_are_dropped():
+    assert validate_key_points({"skills": ["Python"], "expectations": [], "salary": "60k"}) == {"skills": ["Python"], "expectations": []}
+
+
+def test_key_points_are_stored_and_reused(client, fake_llm):
+    posting = unique_posting()
+    assert asyncio.run(extract_key_points(posting)) == {"skills": ["Python", "PostgreSQL"], "expectations": ["Build backend services"]}
+    # Same posting pasted with other spacing and casing
+    assert asyncio.run(extract_key_points("  " + posting.upper().replace(" ", "\n"))) == asyncio.run(find_key_points(posting))
+    assert len(fake_llm.prompts) == 1
+
+
+@pytest.mark.parametrize("response", ['["Python"]', "{}", '{"skills": ["Python"]}'])
+def test_malformed_analysis_is_not_stored(client, fake_llm, response):
+    posting = unique_posting()
+    fake_llm.reply = lambda prompt: response
+    with pytest.raises(Exception, match="HR agent"):
+        asyncio.run(extract_key_points(posting))
+    assert asyncio.run(find_key_points(posting)) is None
+
+
+def test_malformed_stored_analysis_is_replaced(client, fake_llm):
+    posting = unique_posting()
+    with SessionLocal() as db:
+        db.add(JobDescriptionAnalysis(fingerprint=fingerprint(posting), key_points={"skills": "Python"}))
+        db.commit()
+    assert asyncio.run(find_key_points(posting)) is None
+    key_points = asyncio.run(extract_key_points(posting))
+    assert len(fake_llm.prompts) == 1
+    with SessionLocal() as db:
+        assert db.get(JobDescriptionAnalysis, fingerprint(posting)).key_points == key_points
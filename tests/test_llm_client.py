@@ -0,0 +1,215 @@
+import asyncio
+import json
+import time
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from google.api_core import exceptions as google_exceptions
+
+from conftest import RESUME, FakeModel
+from LLM import client as client_module
+from LLM.cache import llm_cache
+from LLM.client import MODEL_NAME, LlmClient
+from LLM.resilience import llm_deadline
+
+
+@pytest.fixture
+def model():
+    return FakeModel()
+
+
+@pytest.fixture
+def llm(model, monkeypatch):
+    """A client of its own, so its semaphore and breaker belong to the test's event loop."""
+    llm = LlmClient(max_in_flight=2)
+    monkeypatch.setattr(llm, "model", lambda name: model)
+    return llm
+
+
+def unique_prompt() -> str:
+    return f"prompt {uuid.uuid4()}"
+
+
+def parse_object(response: str) -> dict:
+    value = json.loads(response)
+    if not isinstance(value, dict):
+        raise ValueError("not an object")
+    return value
+
+
+def test_response_is_cached(llm, model):
+    prompt = unique_prompt()
+    model.reply = lambda prompt: '{"ok": true}'
+    assert asyncio.run(llm.generate(prompt, parse=parse_object)) == {"ok": True}
+    assert asyncio.run(llm.generate(prompt, parse=parse_object)) == {"ok": True}
+    assert len(model.prompts) == 1
+
+
+def test_rejected_response_is_not_cached(llm, model):
+    prompt = unique_prompt()
+    model.reply = lambda prompt: "Sure! Here is the JSON:"
+    with pytest.raises(json.JSONDecodeError):
+        asyncio.run(llm.generate(prompt, parse=parse_object))
+    assert llm_cache.get(MODEL_NAME, prompt) is None
+
+    model.reply = lambda prompt: '{"ok": true}'
+    assert asyncio.run(llm.generate(prompt, parse=parse_object)) == {"ok": True}
+    assert len(model.prompts) == 2
+
+
+def test_invalid_cached_response_is_evicted(llm, model):
+    prompt = unique_prompt()
+    llm_cache.put(MODEL_NAME, prompt, "[1, 2, 3]")  # cached by a caller that didn't validate
+    model.reply = lambda prompt: '{"ok": true}'
+    assert asyncio.run(llm.generate(prompt, parse=parse_object)) == {"ok": True}
+    assert len(model.prompts) == 1
+    assert llm_cache.get(MODEL_NAME, prompt) == '{"ok": true}'
+
+
+def test_no_cache_asks_the_model_again(llm, model):
+    prompt = unique_prompt()
+    asyncio.run(llm.generate(prompt))
+    asyncio.run(llm.generate(prompt, use_cache=False))
+    assert len(model.prompts) == 2
+
+
+def test_identical_concurrent_calls_are_coalesced(llm, model):
+    prompt = unique_prompt()
+
+    async def slow(prompt, stream=False):
+        model.prompts.append(prompt)
+        await asyncio.sleep(0.05)
+        return await FakeModel().generate_content_async(prompt)
+    model.generate_content_async = slow
+
+    async def burst():
+        return await asyncio.gather(*(llm.generate(prompt, use_cache=False) for _ in range(5)))
+
+    assert len(set(asyncio.run(burst()))) == 1
+    assert len(model.prompts) == 1
+    assert llm.coalesced == 4
+
+
+def test_stream_rejected_response_is_not_cached(llm, model):
+    prompt = unique_prompt()
+    model.reply = lambda prompt: "not json"
+
+    async def consume():
+        return [chunk async for chunk in llm.stream(prompt, validate=parse_object)]
+
+    with pytest.raises(json.JSONDecodeError):
+        asyncio.run(consume())
+    assert llm_cache.get(MODEL_NAME, prompt) is None
+
+
+def test_optimize_does_not_cache_an_invalid_resume(client, auth_headers, resume_id, fake_llm):
+    # Through the endpoint and the app's shared client
+    job_description = f"Python developer {uuid.uuid4()}"
+    replies = iter(['{"title": "missing every other field"}', json.dumps(RESUME)])
+    fake_llm.reply = lambda prompt: FakeModel.default_reply(prompt) if "HR specialist" in prompt else next(replies)
+    request = {"resume_id": resume_id, "job_description": job_description}
+
+    first = client.post("/optimize-resume", json=request, headers=auth_headers)
+    assert first.status_code == 500
+    second = client.post("/optimize-resume", json=request, headers=auth_headers)
+    assert second.status_code == 200
+
+
+def test_stream_frees_the_slot_before_the_client_reads(llm, model):
+    model.reply = lambda prompt: '{"ok": true}' * 20
+
+    async def stalled_client():
+        stream = llm.stream(unique_prompt())
+        first = await anext(stream)
+        await asyncio.sleep(0.05)  # the client reads nothing more while the upstream finishes
+        free = llm._semaphore._value
+        rest = [chunk async for chunk in stream]
+        return first + "".join(rest), free
+
+    text, free = asyncio.run(stalled_client())
+    assert text == '{"ok": true}' * 20
+    assert free == 2
+
+
+def half_open(llm):
+    llm.breaker.opened_at = time.monotonic() - llm.breaker.reset
+    assert llm.breaker.state == "half_open"
+
+
+def test_half_open_trial_is_freed_when_the_deadline_is_gone(llm, model):
+    half_open(llm)
+
+    async def expired():
+        with llm_deadline(0):
+            await llm.generate(unique_prompt(), use_cache=False)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(expired())
+    assert error.value.status_code == 504
+    assert not llm.breaker.trial_running
+    # The trial can still be made, and closes the breaker
+    asyncio.run(llm.generate(unique_prompt(), use_cache=False))
+    assert llm.breaker.state == "closed"
+
+
+def test_half_open_trial_is_freed_when_cancelled_waiting_for_a_slot(llm, model):
+    half_open(llm)
+
+    async def cancelled():
+        for _ in range(llm.max_in_flight):
+            await llm._semaphore.acquire()
+        call = asyncio.ensure_future(llm.generate(unique_prompt(), use_cache=False))
+        await asyncio.sleep(0.01)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+
+    asyncio.run(cancelled())
+    assert not llm.breaker.trial_running
+    assert llm.breaker.state == "half_open"
+
+
+def test_slot_wait_is_bounded_by_the_deadline(llm, model):
+    async def all_slots_taken():
+        for _ in range(llm.max_in_flight):
+            await llm._semaphore.acquire()
+        with llm_deadline(0.05):
+            await asyncio.wait_for(llm.generate(unique_prompt(), use_cache=False), 1)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(all_slots_taken())
+    assert error.value.status_code == 504
+    assert model.prompts == []
+
+
+def test_timeout_cut_short_by_the_deadline_is_not_a_breaker_failure(llm, model):
+    async def slow(prompt, stream=False):
+        await asyncio.sleep(1)
+    model.generate_content_async = slow
+
+    async def short_deadline():
+        with llm_deadline(0.05):
+            await llm.generate(unique_prompt(), use_cache=False)
+
+    with pytest.raises(HTTPException):
+        asyncio.run(short_deadline())
+    assert llm.failed >= 1
+    assert llm.breaker.failures == 0
+
+
+def test_stream_retry_does_not_hold_a_slot_while_backing_off(llm, model, monkeypatch):
+    replies = iter([google_exceptions.ServiceUnavailable("overloaded"), '{"ok": true}'])
+    model.reply = lambda prompt: next(replies)
+    monkeypatch.setattr(client_module, "backoff_delay", lambda attempt: 0.1)
+
+    async def retried_stream():
+        reading = asyncio.ensure_future(asyncio.wait_for(llm.stream(unique_prompt()).__anext__(), 2))
+        await asyncio.sleep(0.05)  # the first attempt failed, the retry is waiting
+        free = llm._semaphore._value
+        return await reading, free
+
+    text, free = asyncio.run(retried_stream())
+    assert text == '{"ok": true}'
+    assert free == llm.max_in_flight
+    assert llm.retries == 1
@@ -0,0 +1,23 @@
+from database import async_engine, engine
+from query_budget import count_queries
+
+
+def in_flight(text: str) -> dict:
+    prefix = "http_requests_in_flight{"
+    return {line[len(prefix):].rsplit("}", 1)[0]: float(line.rsplit(" ", 1)[1]) for line in text.splitlines() if line.startswith(prefix)}
+
+
+def test_in_flight_is_labelled_by_route(client, auth_headers, resume_id):
+    client.get(f"/resume/{resume_id}", headers=auth_headers)
+    gauge = in_flight(client.get("/metrics").text)
+    assert gauge['route="/metrics",method="GET"'] == 1  # the request being answered
+    assert gauge['route="/resume/{resume_id}",method="GET"'] == 0
+
+
+def test_one_sql_listener_counts_for_budgets_and_metrics(client):
+    for sql_engine in (engine, async_engine.sync_engine):
+        assert len(sql_engine.dispatch.before_cursor_execute) == 1
+    with count_queries() as counter, engine.connect() as connection:
+        connection.exec_driver_sql("SELECT 1")
+    assert counter.statements == ["SELECT 1"]
+    assert 'sql_queries_total{engine="sync",statement="SELECT",route="background"}' in client.get("/metrics").text
@@ -0,0 +1,43 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+
+from password_hashing import PasswordHasher
+
+
+def slow_hash(password):
+    time.sleep(0.3)
+    return password[::-1]
+
+
+@pytest.fixture
+def hasher(monkeypatch):
+    hasher = PasswordHasher(workers=1, max_pending=1)
+    # Threads instead of spawned processes, so the slow function needs no pickling
+    monkeypatch.setattr(hasher, "_get_executor", lambda executor=ThreadPoolExecutor(max_workers=1): executor)
+    yield hasher
+    hasher._get_executor().shutdown(wait=True)
+
+
+def test_run(hasher):
+    assert asyncio.run(hasher._run(slow_hash, "secret")) == "terces"
+
+
+def test_cancelled_caller_keeps_its_slot_until_the_job_ends(hasher):
+    async def scenario():
+        first = asyncio.ensure_future(hasher._run(slow_hash, "first"))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        await asyncio.sleep(0.05)
+        # The cancelled job is still hashing: no room for another one
+        with pytest.raises(HTTPException) as rejected:
+            await hasher._run(slow_hash, "second")
+        assert rejected.value.status_code == 503
+        await asyncio.sleep(0.4)
+        return await hasher._run(slow_hash, "third")
+
+    assert asyncio.run(scenario()) == "driht"
+    assert hasher.rejected == 1
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from LLM import prompt_budget
+from LLM.prompt_budget import ELLIPSIS, MIN_TRIMMED_TEXT_CHARS, fit_to_budget
+
+LONG = "Designed and ran the billing platform, " * 40
+RESUME = {"title": "Backend engineer", "experiences": [{"title": "Developer", "description": LONG}]}
+KEY_POINTS = {"skills": ["Python"], "expectations": ["Own the billing platform"], "summary": LONG}
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    def set_budget(name, tokens):
+        monkeypatch.setattr(prompt_budget, "_budgets", {name: tokens})
+    return set_budget
+
+
+def fields(prompt: str) -> dict:
+    return json.loads(prompt.split("\n---\n")[0])
+
+
+def format_prompt(values):
+    return f"{values['resume']}\n---\n{values['key_points']}\n---\n{values['job_description']}"
+
+
+def test_resume_to_give_back_is_never_capped(budget, monkeypatch):
+    monkeypatch.setattr(prompt_budget, "PROMPT_COMPACT", True)
+    budget("optimize.yaml:prompt", 10)
+    prompt = fit_to_budget("optimize.yaml:prompt", format_prompt, {"resume": RESUME, "key_points": KEY_POINTS, "job_description": "Python"})
+    assert fields(prompt) == RESUME
+    assert ELLIPSIS in prompt.split("\n---\n")[1]  # the key points are only context
+
+
+def test_evaluated_resume_is_capped(budget):
+    budget("agents.yaml:eval_prompt", 300)
+    prompt = fit_to_budget("agents.yaml:eval_prompt", format_prompt, {"resume": RESUME, "key_points": {}, "job_description": "Python"})
+    assert fields(prompt)["experiences"][0]["description"].endswith(ELLIPSIS)
+
+
+def test_job_description_keeps_a_minimum(budget):
+    budget("agents.yaml:hr_prompt", 10)
+    job_description = "Python developer for the billing team. " * 100
+    prompt = fit_to_budget("agents.yaml:hr_prompt", lambda values: values["job_desc"], {"job_desc": job_description})
+    assert MIN_TRIMMED_TEXT_CHARS - 50 <= len(prompt) <= MIN_TRIMMED_TEXT_CHARS + 1
@@ -0,0 +1,60 @@
+import io
+import zipfile
+
+import pytest
+
+import render_pool
+from db_pool import pool_stats
+from query_budget import QueryBudgetExceeded, QueryCounter, check_budget
+
+
+@pytest.fixture
+def fake_wkhtmltopdf(monkeypatch):
+    monkeypatch.setattr(render_pool, "html_to_pdf", lambda html, timeout: b"%PDF-1.4 test")
+
+
+def test_strict_budget_raises():
+    counter = QueryCounter()
+    counter.count = 8
+    counter.statements = ["SELECT 1"] * 8
+    with pytest.raises(QueryBudgetExceeded):
+        check_budget(counter, 7, "GET /resume")
+
+
+def test_get_resume_within_budget(client, auth_headers, resume_id):
+    # A fresh token: authentication queries the users table too
+    response = client.get(f"/resume/{resume_id}", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["id"] == resume_id
+    assert len(response.json()["experiences"]) == 1
+
+
+def test_generate_pdf_within_budget(client, auth_headers, resume_id, fake_wkhtmltopdf):
+    request = {"resume_id": resume_id, "template_id": "basic"}
+    first = client.post("/generate-resume-pdf", json=request, headers=auth_headers)
+    assert first.status_code == 200
+    assert first.headers["X-Cache"] == "MISS"
+    second = client.post("/generate-resume-pdf", json=request, headers=auth_headers)
+    assert second.status_code == 200
+    assert second.headers["X-Cache"] == "HIT"
+
+
+def test_generate_pdf_batch_within_budget(client, auth_headers, resume_id, fake_wkhtmltopdf):
+    items = [{"resume_id": resume_id, "template_id": template_id} for template_id in ("basic", "basic2")]
+    response = client.post("/generate-resume-pdf/batch", json={"items": items}, headers=auth_headers)
+    assert response.status_code == 200
+    assert len(zipfile.ZipFile(io.BytesIO(response.content)).namelist()) == 2
+
+
+def test_pdf_uses_one_session(client, auth_headers, resume_id, fake_wkhtmltopdf):
+    # Authentication and the endpoint share the async session; the sync pool stays untouched
+    checkouts = pool_stats()["sync"]["checkouts"]
+    response = client.post("/generate-resume-pdf", json={"resume_id": resume_id, "template_id": "basic"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert pool_stats()["sync"]["checkouts"] == checkouts
+
+
+def test_optimize_resume_within_budget(client, auth_headers, resume_id, fake_llm):
+    response = client.post("/optimize-resume", json={"resume_id": resume_id, "job_description": "Python backend developer"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["optimized_resume"]["title"] == "Backend engineer"
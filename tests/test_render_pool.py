@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+import pytest
+
+import render_pool
+from render_pool import PdfRenderPool, RenderPoolFull, RenderTimeout
+
+
+@pytest.fixture
+def slow_wkhtmltopdf(monkeypatch):
+    def html_to_pdf(html, timeout):
+        time.sleep(0.15)
+        return b"%PDF-1.4 " + html.encode()
+    monkeypatch.setattr(render_pool, "html_to_pdf", html_to_pdf)
+
+
+def test_render(slow_wkhtmltopdf):
+    pool = PdfRenderPool(workers=1, queue_depth=1, timeout=5)
+    try:
+        result = asyncio.run(pool.render("<p>hi</p>"))
+    finally:
+        pool.shutdown()
+    assert result.pdf == b"%PDF-1.4 <p>hi</p>"
+    assert pool.stats()["rendered"] == 1
+
+
+def test_queue_wait_and_render_share_the_timeout(slow_wkhtmltopdf):
+    # Each job alone fits in the timeout, but the second one waits for the first
+    pool = PdfRenderPool(workers=1, queue_depth=1, timeout=0.25)
+
+    async def two_jobs():
+        return await asyncio.gather(pool.render("first"), pool.render("second"), return_exceptions=True)
+
+    try:
+        first, second = asyncio.run(two_jobs())
+    finally:
+        pool.shutdown()
+    assert first.pdf == b"%PDF-1.4 first"
+    assert isinstance(second, RenderTimeout)
+
+
+def test_full_queue_is_rejected(slow_wkhtmltopdf):
+    pool = PdfRenderPool(workers=1, queue_depth=0, timeout=5)
+
+    async def two_jobs():
+        return await asyncio.gather(pool.render("first"), pool.render("second"), return_exceptions=True)
+
+    try:
+        first, second = asyncio.run(two_jobs())
+    finally:
+        pool.shutdown()
+    assert first.pdf == b"%PDF-1.4 first"
+    assert isinstance(second, RenderPoolFull)
+    assert pool.stats()["rejected"] == 1
@@ -0,0 +1,62 @@
+import uuid
+
+import pytest
+
+from conftest import RESUME
+
+
+@pytest.fixture
+def profile(client, auth_headers):
+    response = client.post("/user-profile/", json={key: value for key, value in RESUME.items() if key != "title"}, headers=auth_headers)
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_copy_whole_profile(client, auth_headers, profile):
+    response = client.post("/resume/from-profile", json={"title": "From profile"}, headers=auth_headers)
+    assert response.status_code == 200
+    resume = response.json()
+    assert resume["title"] == "From profile"
+    assert resume["personal_info"]["full_name"] == "Jane Doe"
+    assert sorted(skill["skill_name"] for skill in resume["skills"]) == ["PostgreSQL", "Python"]
+    assert resume["experiences"][0]["start_date"] == "2020-01-01"
+    # New rows, not the profile's
+    assert {skill["id"] for skill in resume["skills"]}.isdisjoint(skill["id"] for skill in profile["skills"])
+
+
+def test_copy_selected_items(client, auth_headers, profile):
+    python = next(skill for skill in profile["skills"] if skill["skill_name"] == "Python")
+    response = client.post("/resume/from-profile", json={
+        "title": "Selected", "sections": {"skills": [python["id"]], "projects": []},
+    }, headers=auth_headers)
+    assert response.status_code == 200
+    resume = response.json()
+    assert [skill["skill_name"] for skill in resume["skills"]] == ["Python"]
+    assert resume["projects"] == []
+    assert len(resume["experiences"]) == 1  # not in the selection: copied whole
+
+
+def test_unknown_item_ids_are_rejected(client, auth_headers, profile):
+    unknown = str(uuid.uuid4())
+    response = client.post("/resume/from-profile", json={
+        "title": "Selected", "sections": {"skills": [profile["skills"][0]["id"], unknown]},
+    }, headers=auth_headers)
+    assert response.status_code == 422
+    assert unknown in response.json()["detail"]
+    # Nothing was created
+    assert client.get("/dashboard/resumes", headers=auth_headers).json()["items"] == []
+
+
+def test_other_users_item_ids_are_rejected(client, auth_headers, profile):
+    other = client.post("/register", json={"name": "Joe", "email": f"{uuid.uuid4().hex}@example.com", "password": "secret"})
+    headers = {"Authorization": f"Bearer {other.json()['access_token']}"}
+    client.post("/user-profile/", json={"skills": [{"skill_name": "Go"}]}, headers=headers)
+    response = client.post("/resume/from-profile", json={
+        "title": "Stolen", "sections": {"skills": [profile["skills"][0]["id"]]},
+    }, headers=headers)
+    assert response.status_code == 422
+
+
+def test_without_profile(client, auth_headers):
+    response = client.post("/resume/from-profile", json={"title": "No profile"}, headers=auth_headers)
+    assert response.status_code == 404
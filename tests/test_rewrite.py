@@ -0,0 +1,51 @@
+import asyncio
+import json
+import uuid
+
+from conftest import KEY_POINTS, RESUME
+from LLM.agents import rewrite_agent
+
+
+def state(**overrides) -> dict:
+    # A unique profile keeps the prompts of each test out of the other tests' cache
+    profile = {key: value for key, value in RESUME.items() if key != "title"}
+    profile["personal_info"] = {**profile["personal_info"], "summary": f"Profile {uuid.uuid4()}"}
+    return {
+        "profile_data": profile, "job_description": "Python developer", "generated_resume": RESUME,
+        "hr_key_points": KEY_POINTS, "score": 50, "attempts": 0, "section_feedback": {}, **overrides,
+    }
+
+
+def test_rewrite_without_feedback_generates_again(fake_llm):
+    first = state()
+    asyncio.run(rewrite_agent(first))
+    asyncio.run(rewrite_agent(first))
+    # The first generation's prompt is not answered from the cache
+    assert len(fake_llm.prompts) == 2
+
+
+def test_rewritten_sections_are_merged(fake_llm):
+    skills = [{"skill_name": "Kubernetes"}]
+    fake_llm.reply = lambda prompt: json.dumps({"skills": skills, "personal_info": {"summary": "Python backend developer"}})
+    result = asyncio.run(rewrite_agent(state(section_feedback={"skills": "Add Kubernetes", "personal_info": "Mention Python"})))
+    resume = result["generated_resume"]
+    assert resume["skills"] == skills
+    assert resume["personal_info"] == {**RESUME["personal_info"], "summary": "Python backend developer"}
+    assert resume["experiences"] == RESUME["experiences"]
+    assert result["attempts"] == 1
+
+
+def test_malformed_rewritten_section_keeps_the_previous_one(fake_llm):
+    experiences = [{"title": "Developer", "company": "Acme", "description": "Built Python APIs", "start_date": "2020-01-01"}]
+    fake_llm.reply = lambda prompt: json.dumps({
+        "skills": "Python, Kubernetes",
+        "projects": [{"title": "Resume maker"}],
+        "experiences": experiences,
+        "personal_info": "Python developer",
+    })
+    feedback = {"skills": "More skills", "projects": "More detail", "experiences": "Mention Python", "personal_info": "Shorter"}
+    resume = asyncio.run(rewrite_agent(state(section_feedback=feedback)))["generated_resume"]
+    assert resume["skills"] == RESUME["skills"]
+    assert resume["projects"] == RESUME["projects"]
+    assert resume["personal_info"] == RESUME["personal_info"]
+    assert resume["experiences"] == experiences
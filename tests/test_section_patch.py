@@ -0,0 +1,73 @@
+import uuid
+
+import pytest
+
+from conftest import RESUME
+
+
+@pytest.fixture
+def profile(client, auth_headers):
+    response = client.post("/user-profile/", json={key: value for key, value in RESUME.items() if key != "title"}, headers=auth_headers)
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_patch_resume_sections(client, auth_headers, resume_id):
+    resume = client.get(f"/resume/{resume_id}", headers=auth_headers).json()
+    experience_id = resume["experiences"][0]["id"]
+    skill_ids = [skill["id"] for skill in resume["skills"]]
+
+    response = client.patch(f"/resume/{resume_id}", json={
+        "title": "Platform engineer",
+        "experiences": {"update": [{"id": experience_id, "company": "Globex", "end_date": "2023-12-31"}]},
+        "skills": {"add": [{"skill_name": "Kubernetes"}], "remove": [skill_ids[0]]},
+    }, headers=auth_headers)
+    assert response.status_code == 200
+    patched = response.json()
+    assert patched["title"] == "Platform engineer"
+    assert patched["experiences"][0]["company"] == "Globex"
+    assert patched["experiences"][0]["title"] == "Developer"  # not sent, not changed
+    assert patched["experiences"][0]["end_date"] == "2023-12-31"
+    assert sorted(skill["skill_name"] for skill in patched["skills"]) == ["Kubernetes", "PostgreSQL"]
+
+    # A nullable column can be cleared
+    response = client.patch(f"/resume/{resume_id}", json={
+        "experiences": {"update": [{"id": experience_id, "end_date": None}]},
+    }, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["experiences"][0]["end_date"] is None
+
+
+@pytest.mark.parametrize("section, field", [
+    ("experiences", "start_date"),
+    ("experiences", "title"),
+    ("educations", "used_skills"),
+    ("skills", "skill_name"),
+    ("certifications", "date"),
+    ("projects", "description"),
+])
+def test_null_for_a_required_field_is_rejected(client, auth_headers, resume_id, section, field):
+    item_id = client.get(f"/resume/{resume_id}", headers=auth_headers).json()[section][0]["id"]
+    response = client.patch(f"/resume/{resume_id}", json={section: {"update": [{"id": item_id, field: None}]}}, headers=auth_headers)
+    assert response.status_code == 422
+    assert client.get(f"/resume/{resume_id}", headers=auth_headers).status_code == 200
+
+
+def test_null_for_a_required_profile_field_is_rejected(client, auth_headers, profile):
+    item_id = profile["experiences"][0]["id"]
+    response = client.patch("/user-profile/", json={"experiences": {"update": [{"id": item_id, "company": None}]}}, headers=auth_headers)
+    assert response.status_code == 422
+    assert client.get("/user-profile/", headers=auth_headers).json()["experiences"][0]["company"] == "Acme"
+
+
+def test_patch_unknown_item(client, auth_headers, resume_id):
+    response = client.patch(f"/resume/{resume_id}", json={"skills": {"remove": [str(uuid.uuid4())]}}, headers=auth_headers)
+    assert response.status_code == 404
+    assert len(client.get(f"/resume/{resume_id}", headers=auth_headers).json()["skills"]) == 2
+
+
+def test_patch_other_users_resume(client, auth_headers, resume_id):
+    other = client.post("/register", json={"name": "Joe", "email": f"{uuid.uuid4().hex}@example.com", "password": "secret"})
+    headers = {"Authorization": f"Bearer {other.json()['access_token']}"}
+    response = client.patch(f"/resume/{resume_id}", json={"title": "Mine now"}, headers=headers)
+    assert response.status_code == 404
@@ -1,25 +1,29 @@
 import uuid
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from database import get_db
-from models import UserProfile, UserExperience, UserEducation, UserSkill, UserCertification, UserProject, User
-from schemas import UserProfileCreate, UserProfileResponse, UserProfileUpdate
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
+from models import UserProfile, UserExperience, UserEducation, UserSkill, UserCertification, UserProject
+from schemas import UserProfileCreate, UserProfilePatch, UserProfileResponse, UserProfileUpdate
 from utils import get_current_user
+from user_cache import CurrentUser
+from resume_loader import load_profile_async
+from section_patch import PROFILE_SECTION_MODELS, apply_sections_patch, touch
 
 router = APIRouter(prefix="/user-profile", tags=["User Profile"])
 
 @router.post("/", response_model=UserProfileResponse, status_code=status.HTTP_201_CREATED)
-def create_user_profile(
+async def create_user_profile(
     profile: UserProfileCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Create a new user profile for the authenticated user.
     Raises an error if a profile already exists.
     """
     # Check if a profile already exists for the user
-    existing_profile = db.query(UserProfile).filter(UserProfile.user_id == current_user.id).first()
+    existing_profile = (await db.execute(select(UserProfile.id).where(UserProfile.user_id == current_user.id))).scalar()
     if existing_profile:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User profile already exists")
 
@@ -29,8 +33,8 @@ def create_user_profile(
         personal_info=profile.personal_info.dict() if profile.personal_info else None
     )
     db.add(db_profile)
-    db.commit()
-    db.refresh(db_profile)
+    await db.commit()
+    await db.refresh(db_profile)
 
     # Add related data if provided
     for exp in profile.experiences or []:
@@ -44,32 +48,32 @@ def create_user_profile(
     for proj in profile.projects or []:
         db.add(UserProject(profile_id=db_profile.id, **proj.dict()))
 
-    db.commit()
-    return db_profile
+    await db.commit()
+    return await load_profile_async(db, current_user.id)
 
 @router.get("/", response_model=UserProfileResponse)
-def get_user_profile(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+async def get_user_profile(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Retrieve the authenticated user's profile, including all related data.
     """
-    profile = db.query(UserProfile).filter(UserProfile.user_id == current_user.id).first()
+    profile = await load_profile_async(db, current_user.id)
     if not profile:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User profile not found")
     return profile
 
 @router.put("/", response_model=UserProfileResponse)
-def updatefacieuser_profile(
+async def updatefacieuser_profile(
     profile_update: UserProfileUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Update the authenticated user's profile. Replaces all related data with the provided data.
     """
-    db_profile = db.query(UserProfile).filter(UserProfile.user_id == current_user.id).first()
+    db_profile = (await db.execute(select(UserProfile).where(UserProfile.user_id == current_user.id))).scalars().first()
     if not db_profile:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User profile not found")
 
@@ -79,7 +83,7 @@ def updatefacieuser_profile(
 
     # Delete all existing related data
     for model in [UserExperience, UserEducation, UserSkill, UserCertification, UserProject]:
-        db.query(model).filter(model.profile_id == db_profile.id).delete()
+        await db.execute(delete(model).where(model.profile_id == db_profile.id))
 
     # Add new related data if provided
     for exp in profile_update.experiences or []:
@@ -93,21 +97,43 @@ def updatefacieuser_profile(
     for proj in profile_update.projects or []:
         db.add(UserProject(profile_id=db_profile.id, **proj.dict()))
 
-    db.commit()
-    db.refresh(db_profile)
-    return db_profile
+    await db.commit()
+    return await load_profile_async(db, current_user.id)
+
+@router.patch("/", response_model=UserProfileResponse)
+async def patch_user_profile(
+    profile_patch: UserProfilePatch,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Apply per-section changes (add, update by id, remove by id) to the authenticated
+    user's profile in one transaction, touching only the rows that actually changed.
+    """
+    profile_id = (await db.execute(select(UserProfile.id).where(UserProfile.user_id == current_user.id))).scalar()
+    if not profile_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User profile not found")
+
+    values = {}
+    if profile_patch.personal_info is not None:
+        values["personal_info"] = profile_patch.personal_info.dict()
+    await touch(db, UserProfile, [UserProfile.id == profile_id], **values)
+    await apply_sections_patch(db, PROFILE_SECTION_MODELS, "profile_id", profile_id, profile_patch)
+    await db.commit()
+    return await load_profile_async(db, current_user.id)
 
 @router.delete("/")
-def delete_user_profile(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+async def delete_user_profile(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Delete the authenticated user's profile and all related data.
     """
-    profile = db.query(UserProfile).filter(UserProfile.user_id == current_user.id).first()
+    # Sections are loaded up front so the delete-orphan cascade doesn't lazy load them
+    profile = await load_profile_async(db, current_user.id)
     if not profile:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User profile not found")
-    db.delete(profile)
-    db.commit()
+    await db.delete(profile)
+    await db.commit()
     return {"message": "User profile deleted"}
\ No newline at end of file